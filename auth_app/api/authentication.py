@@ -0,0 +1,161 @@
+"""
+Authentication classes for the Coderr APIs.
+
+CachedTokenAuthentication is a drop-in replacement for DRF's
+TokenAuthentication that keeps recently used tokens in a bounded
+in-process LRU cache, so repeated requests with the same token skip the
+token/user lookup. Entries expire after a TTL and are dropped as soon as
+the token, its user or the user's profile is saved or deleted in this
+process (see auth_app.signals). Writes that bypass model signals, or
+happen in another process, become visible after the TTL at the latest.
+"""
+
+import copy
+import threading
+import time
+
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+
+def get_cache_size():
+    return getattr(settings, 'TOKEN_AUTH_CACHE_SIZE', 1024)
+
+
+def get_cache_ttl():
+    return getattr(settings, 'TOKEN_AUTH_CACHE_TTL', 60)
+
+
+class TokenCache:
+    """
+    Thread-safe LRU cache of token key -> (user, token) with a TTL.
+
+    Keeps a reverse index from user id to cached keys, so all tokens of
+    a user can be invalidated when the user changes.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._keys_by_user = {}
+        self._lock = threading.Lock()
+
+
+    def get(self, key):
+        """Return the cached (user, token) for key, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            user, token, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return user, token
+
+
+    def set(self, key, user, token):
+        size = get_cache_size()
+        if size <= 0:
+            return
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (user, token, time.monotonic() + get_cache_ttl())
+            self._keys_by_user.setdefault(user.pk, set()).add(key)
+            while len(self._entries) > size:
+                self._remove(next(iter(self._entries)))
+
+
+    def invalidate_key(self, key):
+        with self._lock:
+            self._remove(key)
+
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for key in list(self._keys_by_user.get(user_id, ())):
+                self._remove(key)
+
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+
+    def __len__(self):
+        return len(self._entries)
+
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        user_id = entry[0].pk
+        keys = self._keys_by_user.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[user_id]
+
+
+token_cache = TokenCache()
+
+
+def _copy_instance(instance):
+    """Shallow copy of a model instance with its own state and an empty relation cache."""
+    instance = copy.copy(instance)
+    instance._state = copy.copy(instance._state)
+    instance._state.fields_cache = {}
+    return instance
+
+
+def copy_user(user):
+    """
+    Return a copy of a cached user that shares no mutable state with it.
+
+    copy.copy() alone would share _state.fields_cache, so the profile
+    loaded with the user would be one object for all requests. The
+    profile is copied as well and linked to the new user.
+    """
+    user_copy = _copy_instance(user)
+    if 'profile' in user._state.fields_cache:
+        profile = user._state.fields_cache['profile']
+        if profile is not None:
+            profile = _copy_instance(profile)
+            profile._state.fields_cache['user'] = user_copy
+        user_copy._state.fields_cache['profile'] = profile
+    return user_copy
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication backed by an in-process cache.
+
+    The user is loaded together with its profile in one query on a miss.
+    Every request gets its own copy of the cached user, so per-request
+    attributes never leak between requests.
+    """
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is None:
+            model = self.get_model()
+            try:
+                token = model.objects.select_related('user', 'user__profile').get(key=key)
+            except model.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+            if not token.user.is_active:
+                raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+            token_cache.set(key, token.user, token)
+            cached = (token.user, token)
+
+        user, token = cached
+        return (copy_user(user), token)
@@ -8,13 +8,19 @@ profile updates, and custom profile representations.
 import re
 
 from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
 from django.utils import timezone
 
 from rest_framework import serializers
+from rest_framework.authtoken.models import Token
 
 from auth_app.models import Profile
+from coderr_app.api.mixins import TimedSerializerMixin
+from coderr_app.images import schedule_image_processing, delete_image_files, get_variant_url
 
-class ProfileSerializer(serializers.ModelSerializer):
+USER_EMAIL_INDEX = 'auth_user_email_ci_uniq'
+
+class ProfileSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     Serializer for the Profile model.
 
@@ -60,6 +66,9 @@ class ProfileSerializer(serializers.ModelSerializer):
         """
         Update user-related fields inside the User model.
 
+        An email that another user already has, in any case, is rejected
+        by the unique index and reported as a validation error.
+
         Parameters
         ----------
         instance : Profile
@@ -73,13 +82,22 @@ class ProfileSerializer(serializers.ModelSerializer):
         user_instance.first_name = user_data.get("first_name", user_instance.first_name)
         user_instance.last_name = user_data.get("last_name", user_instance.last_name)
         user_instance.email = user_data.get("email", user_instance.email)
-        user_instance.save()
+        try:
+            with transaction.atomic():
+                user_instance.save()
+        except IntegrityError as exc:
+            if USER_EMAIL_INDEX in str(exc):
+                raise serializers.ValidationError({'email': ["Email already exists."]})
+            raise
         
 
     def update(self, instance, validated_data):
         """
         Update the Profile instance and its related User.
 
+        A new file is queued for background processing after the update;
+        the variants of the replaced file are removed.
+
         Returns
         -------
         Profile
@@ -88,8 +106,11 @@ class ProfileSerializer(serializers.ModelSerializer):
 
         self.update_user(instance=instance, validated_data=validated_data)
 
-        if not validated_data.get("file") == None:
-            instance.file = validated_data.get("file", "")
+        new_file = validated_data.get("file")
+        if not new_file == None:
+            delete_image_files(instance.file, instance.file_variants, keep_original=True)
+            instance.file = new_file
+            instance.file_variants = None
             instance.uploaded_at = timezone.now()
             
         instance.location = validated_data.get("location", instance.location)
@@ -98,6 +119,9 @@ class ProfileSerializer(serializers.ModelSerializer):
         instance.working_hours = validated_data.get("working_hours", instance.working_hours)
         instance.save()
 
+        if not new_file == None:
+            schedule_image_processing(instance, 'file', 'file_variants')
+
         return instance
 
 
@@ -138,6 +162,9 @@ class ProfileSerializer(serializers.ModelSerializer):
                 "type": type
             }
         
+        if view and view.__class__.__name__ == "ProfileListView":
+            ordered['file'] = self.set_null_to_empty_str(get_variant_url(instance.file, instance.file_variants, request))
+
         if view and view.__class__.__name__ == "ProfileUpdateRetriveView" or request.method == 'PATCH':
             ordered['email']=instance.user.email
             ordered['created_at']=self.set_null_to_empty_str(rep.get('created_at'))
@@ -150,8 +177,8 @@ class RegistrationSerializer(serializers.ModelSerializer):
     """
     Serializer for user registration.
 
-    Handles validation of username, email, password confirmation,
-    and creation of both User and Profile instances.
+    Handles validation of the password confirmation and the creation
+    of the User, its Profile and its Token.
     """
 
     email = serializers.EmailField(required=True)
@@ -180,22 +207,15 @@ class RegistrationSerializer(serializers.ModelSerializer):
         return validated_data
     
 
-    def validate_username(self, value):
-        """Ensure that the username is unique."""
-        if User.objects.filter(username=value).exists():
-            raise serializers.ValidationError("Username already exists.")
-        return value
-
-    def validate_email(self, value):
-        """Ensure that the email is unique."""
-        if User.objects.filter(email=value).exists():
-            raise serializers.ValidationError("Email already exists.")
-        return value
-    
-
     def create(self, validated_data):
         """
-        Create a new User and an associated Profile.
+        Create a new User with its Profile and Token in one transaction.
+
+        Duplicate usernames and emails (case-insensitive) are rejected by
+        unique indexes, so no existence queries run before the insert.
+
+        A password_hash passed to save() is stored as is, so callers can
+        hash the password elsewhere (see AsyncRegistrationView).
 
         Returns
         -------
@@ -204,19 +224,32 @@ class RegistrationSerializer(serializers.ModelSerializer):
         """
 
         password = validated_data.pop('password')
+        password_hash = validated_data.pop('password_hash', None)
         validated_data.pop('repeated_password')
         user_type = validated_data.pop('type')
         user = User(
             username=validated_data['username'],
             email=validated_data['email']
         )
-        user.set_password(password)
-        user.save()
-
-        Profile.objects.create(
-            user=user,
-            type=user_type,
-            created_at=timezone.now()
-        )
+        if password_hash:
+            user.password = password_hash
+        else:
+            user.set_password(password)
+
+        try:
+            with transaction.atomic():
+                user.save()
+                Profile.objects.create(
+                    user=user,
+                    type=user_type,
+                    created_at=timezone.now()
+                )
+                Token.objects.create(user=user)
+        except IntegrityError as exc:
+            if USER_EMAIL_INDEX in str(exc):
+                raise serializers.ValidationError({'email': ["Email already exists."]})
+            if 'username' in str(exc):
+                raise serializers.ValidationError({'username': ["Username already exists."]})
+            raise
 
         return user
\ No newline at end of file
@@ -2,21 +2,32 @@
 Django REST Framework views for authentication and user profiles.
 
 This module provides views for registration, login, profile retrieval,
-updates, and listing users by type (customer/business).
+updates, and listing users by type (customer/business). Login and
+registration also have async variants, served under ASGI.
 """
 
+from asgiref.sync import sync_to_async
+
+from django.contrib.auth import aauthenticate
 from django.contrib.auth.models import User
 
 from rest_framework import status, generics
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.authtoken.models import Token
 from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 
+from auth_app.hashing import amake_password
 from auth_app.models import Profile
+from coderr_app.api.mixins import AsyncAPIViewMixin, ConditionalRetrieveMixin
+from coderr_app.api.paginations import ResultsSetPagination
 from .serializers import RegistrationSerializer, ProfileSerializer
 from .permissions import IsOwner
 
+LOGIN_FAILED = 'Unable to log in with provided credentials.'
+
 class RegistrationView(generics.CreateAPIView):
     """
     Handle user registration and token creation.
@@ -40,9 +51,8 @@ class RegistrationView(generics.CreateAPIView):
 
         if serializer.is_valid():
             saved_account = serializer.save()
-            token, created = Token.objects.get_or_create(user=saved_account)
             data = {
-                'token': token.key,
+                'token': saved_account.auth_token.key,
                 'username': saved_account.username,
                 'email': saved_account.email,
                 'user_id': saved_account.id
@@ -88,30 +98,102 @@ class LoginView(ObtainAuthToken):
             return Response(data, status=status.HTTP_400_BAD_REQUEST)
         
 
-class ProfileUpdateRetriveView(generics.RetrieveUpdateAPIView):
+class AsyncRegistrationView(AsyncAPIViewMixin, RegistrationView):
+    """
+    Async registration for the ASGI entry point.
+
+    Validation and writes run through sync_to_async; the password is
+    hashed in the bounded hashing pool, off the event loop.
+    """
+
+    async def post(self, request):
+        """Register a new user and return authentication token."""
+        serializer = RegistrationSerializer(data=request.data)
+
+        if not await sync_to_async(serializer.is_valid)():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        password_hash = await amake_password(serializer.validated_data['password'])
+        saved_account = await sync_to_async(serializer.save)(password_hash=password_hash)
+        data = {
+            'token': saved_account.auth_token.key,
+            'username': saved_account.username,
+            'email': saved_account.email,
+            'user_id': saved_account.id
+        }
+        return Response(data, status=status.HTTP_201_CREATED)
+
+
+class AsyncLoginView(AsyncAPIViewMixin, LoginView):
+    """
+    Async login for the ASGI entry point.
+
+    The credentials are validated by the fields of the login serializer
+    and checked with aauthenticate(), so the configured backends and the
+    user_login_failed signal run as on the sync view. The model backend
+    verifies the password in the bounded hashing pool, off the event loop.
+    """
+
+    async def post(self, request):
+        """Authenticate user and return token with basic user info."""
+        serializer = self.serializer_class(data=request.data)
+        try:
+            credentials = serializer.to_internal_value(request.data)
+        except ValidationError as exc:
+            return Response(exc.detail, status=status.HTTP_400_BAD_REQUEST)
+
+        user = await aauthenticate(request=request._request, username=credentials['username'], password=credentials['password'])
+        if user is None:
+            return Response({api_settings.NON_FIELD_ERRORS_KEY: [LOGIN_FAILED]}, status=status.HTTP_400_BAD_REQUEST)
+
+        token, created = await Token.objects.aget_or_create(user=user)
+        data = {
+            'token': token.key,
+            'username': user.username,
+            'email': user.email,
+            'user_id': user.id
+        }
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class ProfileUpdateRetriveView(ConditionalRetrieveMixin, generics.RetrieveUpdateAPIView):
     """
     Retrieve or update the authenticated user's profile.
+
+    GET supports conditional requests via ETag. There is no
+    Last-Modified, since no timestamp changes when the profile text or
+    the user's name or email is edited.
     """
     permission_classes = [IsAuthenticated, IsOwner]
     serializer_class = ProfileSerializer
     queryset = Profile.objects.all()
+    etag_fields = (
+        'user',
+        'user__username',
+        'user__first_name',
+        'user__last_name',
+        'user__email',
+        'file',
+        'location',
+        'tel',
+        'description',
+        'working_hours',
+        'type'
+    )
 
 
 class ProfileListView(generics.ListAPIView):
     """
-    List all profiles or filter them by type (business/customer).
+    List the profiles of one type (business/customer), paginated.
+
+    The type comes from the URL kwargs; the users are loaded in the
+    same query.
     """
     permission_classes = [IsAuthenticated]
     serializer_class = ProfileSerializer
     queryset = Profile.objects.all()
+    pagination_class = ResultsSetPagination
 
     def get_queryset(self):
-        """Return filtered queryset based on path ('business' or 'customer')."""
-        queryset = super().get_queryset()
-        path = self.request.path
-
-        if "business" in path:
-            return queryset.filter(type="business")
-        elif "customer" in path:
-            return queryset.filter(type="customer")
-        return queryset
\ No newline at end of file
+        """Return the profiles of the type given in the URL, in a stable order."""
+        return super().get_queryset().filter(type=self.kwargs['type']).select_related('user').order_by('id')
\ No newline at end of file
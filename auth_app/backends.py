@@ -0,0 +1,41 @@
+"""
+Authentication backends for the Coderr APIs.
+"""
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+from auth_app.hashing import acheck_password, amake_password
+
+UserModel = get_user_model()
+
+
+class HashingPoolModelBackend(ModelBackend):
+    """
+    ModelBackend that hashes in the bounded hashing pool under ASGI.
+
+    Django's aauthenticate() verifies the password on the event loop.
+    This one runs the same steps, including the dummy hash for unknown
+    users and the rehash of outdated hashes, but hashes through
+    auth_app.hashing. The sync authenticate() is unchanged.
+    """
+
+    async def aauthenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return
+        try:
+            user = await UserModel._default_manager.aget_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            await amake_password(password)
+            return
+
+        valid, must_update = await acheck_password(password, user.password)
+        if not valid:
+            return
+        if must_update:
+            user.password = await amake_password(password)
+            await user.asave(update_fields=['password'])
+        if self.user_can_authenticate(user):
+            return user
@@ -0,0 +1,52 @@
+"""
+Password hashing off the event loop.
+
+PBKDF2 takes tens of milliseconds per call. The async login and
+registration views hash and verify passwords in a small thread pool
+instead of on the event loop, so other requests keep being served during
+a login burst. The pool size caps how many hashes run at once; further
+logins queue until a worker is free.
+"""
+
+import asyncio
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, identify_hasher, make_password
+
+_executor = None
+
+
+def get_executor():
+    """Return the shared hashing pool, creating it on first use."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'PASSWORD_HASHING_CONCURRENCY', 2),
+            thread_name_prefix='password-hashing'
+        )
+    return _executor
+
+
+async def run_in_hashing_pool(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), partial(func, *args))
+
+
+def _verify(password, encoded):
+    """Return (valid, must_update) for a raw password and a stored hash."""
+    if not check_password(password, encoded):
+        return False, False
+    return True, identify_hasher(encoded).must_update(encoded)
+
+
+async def acheck_password(password, encoded):
+    """Verify a password in the hashing pool. Returns (valid, must_update)."""
+    return await run_in_hashing_pool(_verify, password, encoded)
+
+
+async def amake_password(password):
+    """Hash a password in the hashing pool."""
+    return await run_in_hashing_pool(make_password, password)
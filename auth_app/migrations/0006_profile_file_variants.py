@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-17 06:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth_app', '0005_alter_profile_tel'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='file_variants',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='profile',
+            name='file',
+            field=models.ImageField(blank=True, null=True, upload_to='user_images/'),
+        ),
+    ]
@@ -25,6 +25,7 @@ class Profile(models.Model):
 
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     file = models.ImageField(upload_to='user_images/', null=True, blank=True)
+    file_variants = models.JSONField(null=True, blank=True)
     location = models.CharField(max_length=30)
     tel = models.CharField(max_length=50)
     description = models.CharField(max_length=255)
@@ -33,6 +34,11 @@ class Profile(models.Model):
     created_at = models.DateTimeField()
     uploaded_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['type', 'id'], name='profile_type_id_idx'),
+        ]
+
     def __str__(self):
         """Return a string representation of the profile with user ID."""
         return f"Profile {self.id} from user {self.user.id}"
\ No newline at end of file
@@ -0,0 +1,35 @@
+"""
+Signal handlers for the auth app.
+
+Drop cached token authentications when a token, its user or the user's
+profile is saved or deleted.
+"""
+
+from django.contrib.auth.models import User
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from auth_app.api.authentication import token_cache
+from auth_app.models import Profile
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def invalidate_cached_token(sender, instance, **kwargs):
+    """Forget a token after it was regenerated or deleted."""
+    token_cache.invalidate_key(instance.key)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user_tokens(sender, instance, **kwargs):
+    """Forget all cached tokens of a user after the user changed or was deleted."""
+    token_cache.invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidate_cached_profile_tokens(sender, instance, **kwargs):
+    """Forget all cached tokens of a user after the profile changed, as the profile is cached with the user."""
+    token_cache.invalidate_user(instance.user_id)
@@ -6,13 +6,29 @@ Covers:
 - Profile retrieval, update, and list endpoints
 """
 
-from django.urls import reverse
+import asyncio
+import threading
+import time
+
+from unittest.mock import patch
+
+from asgiref.sync import async_to_sync
+
+from django.contrib.auth.hashers import check_password
+from django.contrib.auth.signals import user_login_failed
+from django.db import IntegrityError, connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
 from django.contrib.auth.models import User
 
 from rest_framework import status
 from rest_framework.test import APITestCase
 from rest_framework.authtoken.models import Token
 
+from auth_app import hashing
+from auth_app.api.authentication import CachedTokenAuthentication, token_cache
+from auth_app.api.views import AsyncLoginView
 from .utils import (
     create_test_image_file,
     create_test_user,
@@ -22,6 +38,7 @@ from .utils import (
     first_name,
     last_name,
     image_name,
+    password,
     username
 )
 
@@ -66,6 +83,25 @@ class RegistrationTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
 
+    def test_post_duplicate_email_case_insensitive_and_atomic(self):
+        """Test duplicate emails are rejected by the index in any case and failed registrations leave no user."""
+        self.client.post(self.url, self.data, format='json')
+        data = {**self.data, "username": "OtherUser", "email": "TEST@User.de"}
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {'email': ['Email already exists.']})
+        self.assertFalse(any(query['sql'].startswith('SELECT') and '"auth_user"' in query['sql'] for query in queries))
+
+        data = {**self.data, "username": "OtherUser", "email": "other@user.de"}
+        with patch('auth_app.api.serializers.Token.objects.create', side_effect=IntegrityError('token')):
+            with self.assertRaises(IntegrityError):
+                self.client.post(self.url, data, format='json')
+
+        self.assertFalse(User.objects.filter(username="OtherUser").exists())
+
+
     def test_post_fails_password_mismatch(self):
         data = {
             "username": self.username,
@@ -132,6 +168,82 @@ class LoginTests(APITestCase):
             self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
 
+@override_settings(ROOT_URLCONF='core.asgi_urls')
+class AsyncAuthTests(APITestCase):
+    """Test cases for the async login and registration views served under ASGI."""
+
+    def test_register_and_login(self):
+        """Test registering and logging in through the async views, hashing in the pool."""
+        self.assertIs(resolve(reverse('login')).func.view_class, AsyncLoginView)
+        data = {
+            "username": username,
+            "email": "async@mail.de",
+            "password": "examplePassword",
+            "repeated_password": "examplePassword",
+            "type": "customer"
+        }
+        response = self.client.post(reverse('registration'), data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(User.objects.get(username=username).check_password("examplePassword"))
+
+        response = self.client.post(reverse('registration'), data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(reverse('login'), {"username": username, "password": "examplePassword"}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['token'], Token.objects.get(user__username=username).key)
+
+        failed_logins = []
+
+        def record_failed_login(sender, credentials, **kwargs):
+            failed_logins.append(credentials)
+
+        user_login_failed.connect(record_failed_login, dispatch_uid='test_async_login')
+        self.addCleanup(user_login_failed.disconnect, dispatch_uid='test_async_login')
+        for credentials in [{"username": username, "password": "WRONG"}, {"username": "WRONG", "password": "x"}, {"username": username}, {}]:
+            response = self.client.post(reverse('login'), credentials, format='json')
+            with override_settings(ROOT_URLCONF='core.urls'):
+                sync_response = self.client.post(reverse('login'), credentials, format='json')
+
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(response.data, sync_response.data)
+        # Wrong credentials fail on both views, missing ones never reach the backends.
+        self.assertEqual(len(failed_logins), 4)
+
+
+    def test_login_hashing_concurrency(self):
+        """Test concurrent async logins hash at most PASSWORD_HASHING_CONCURRENCY passwords at once."""
+        create_test_user()
+        running, peak = 0, 0
+        lock = threading.Lock()
+
+        def tracked_check_password(password, encoded):
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.05)
+            with lock:
+                running -= 1
+            return check_password(password, encoded)
+
+        async def login_burst():
+            credentials = {"username": username, "password": password}
+            return await asyncio.gather(*(self.async_client.post(reverse('login'), credentials) for _ in range(6)))
+
+        with override_settings(PASSWORD_HASHING_CONCURRENCY=2), \
+                patch.object(hashing, '_executor', None), \
+                patch.object(hashing, 'check_password', tracked_check_password):
+            responses = async_to_sync(login_burst)()
+            hashing.get_executor().shutdown()
+
+        self.assertEqual([response.status_code for response in responses], [status.HTTP_200_OK] * 6)
+        self.assertEqual(peak, 2)
+
+
 class ProfileTests(APITestCase):
     """Test cases for profile endpoints."""
 
@@ -185,6 +297,69 @@ class ProfileTests(APITestCase):
         self.assertIsInstance(response.data['created_at'], str, msg='Created_at is not a string!')
 
 
+    def test_get_detail_conditional(self):
+        """Test retrieving an unchanged profile with its ETag returns 304 and edits are never hidden by dates."""
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        response = self.client.get(self.url_detail)
+        etag = response['ETag']
+
+        self.assertFalse(response.has_header('Last-Modified'))
+
+        response = self.client.get(self.url_detail, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.user.first_name = 'Erika'
+        self.user.save()
+        response = self.client.get(self.url_detail, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(self.url_detail, HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+    def test_token_authentication_cached(self):
+        """Test repeated requests with a token skip the token lookup until the token or user changes."""
+        token_cache.clear()
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        self.client.get(self.url_detail)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url_detail)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(any('"authtoken_token"' in query['sql'] for query in queries))
+
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(self.url_detail)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.second_token.key)
+        self.client.get(self.url_detail)
+        self.second_token.delete()
+        response = self.client.get(self.url_detail)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+    def test_token_authentication_cached_user_copied(self):
+        """Test every request gets its own copy of the cached user and its profile."""
+        token_cache.clear()
+        authentication = CachedTokenAuthentication()
+        first, _ = authentication.authenticate_credentials(self.token.key)
+        with self.assertNumQueries(0):
+            second, _ = authentication.authenticate_credentials(self.token.key)
+            first.profile.location = 'Changed'
+
+            self.assertIsNot(first.profile, second.profile)
+            self.assertIs(second.profile.user, second)
+            self.assertEqual(second.profile.location, self.profile.location)
+
+
     def test_get_detail_fails_not_authorized(self):
         """Test retrieving profile detail fails without authentication."""
         response = self.client.get(self.url_detail)
@@ -223,6 +398,21 @@ class ProfileTests(APITestCase):
         self.assertIsInstance(response.data['created_at'], str, msg='First name is not a string!')
 
 
+    def test_patch_detail_fails_email_exists(self):
+        """Test updating the email to another user's email, in any case, fails without changes."""
+        create_test_user(username='Taken', email='a@x.de')
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+
+        response = self.client.patch(self.url_detail, {'email': 'A@x.de', 'location': 'Hamburg'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {'email': ['Email already exists.']})
+        self.user.refresh_from_db()
+        self.profile.refresh_from_db()
+        self.assertNotEqual(self.user.email, 'A@x.de')
+        self.assertEqual(self.profile.location, 'Berlin')
+
+
     def test_patch_detail_fails_not_authorized(self):
         """Test updating profile fails without authentication."""
         response = self.client.patch(self.url_detail, self.patch_data, format='multipart')
@@ -268,10 +458,28 @@ class ProfileTests(APITestCase):
         response = self.client.get(self.url_business)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        for item in response.data:
+        for item in response.data['results']:
             self.assertEqual(set(item.keys()), expected_fields)
 
 
+    def test_get_list_paginated_without_per_row_queries(self):
+        """Test profile lists are paginated, filtered by type, and load users in the same query."""
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        self.client.get(self.url_business)
+        with CaptureQueriesContext(connection) as single_profile:
+            self.client.get(self.url_business)
+
+        for index in range(3):
+            create_test_users_profile(create_test_user(username=f'business_{index}'))
+        with CaptureQueriesContext(connection) as many_profiles:
+            response = self.client.get(self.url_business, {'page_size': 2})
+
+        self.assertEqual(response.data['count'], 4)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertTrue(all(item['type'] == 'business' for item in response.data['results']))
+        self.assertEqual(len(many_profiles), len(single_profile))
+
+
     def test_get_list_business_fails_not_authorized(self):
         """Test retrieving business profile list fails without authentication."""
         response = self.client.get(self.url_business)
@@ -295,7 +503,7 @@ class ProfileTests(APITestCase):
         response = self.client.get(self.url_customer)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        for item in response.data:
+        for item in response.data['results']:
             self.assertEqual(set(item.keys()), expected_fields)
 
 
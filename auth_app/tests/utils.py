@@ -38,18 +38,25 @@ def create_test_image_file():
     return SimpleUploadedFile(image_name, image.read(), content_type='image/jpeg')
 
 
+def get_test_email(name):
+    """Return the default email of a test user; emails are unique per user."""
+    if name == username:
+        return email
+    return f"{name.replace(' ', '_').lower()}@mail.de"
+
+
 def create_test_user(
         username = username,
         password = password,
-        email = email,
+        email = None,
         first_name = first_name,
         last_name = last_name,
 ):
-    """Create and return a test user."""
+    """Create and return a test user. Without an email, one is derived from the username."""
     return User.objects.create_user(
             username=username,
             password=password,
-            email=email,
+            email=email or get_test_email(username),
             first_name=first_name,
             last_name=last_name
         )
@@ -1,7 +1,25 @@
 from django.contrib import admin
-from .models import Offer, Detail, Order, Review
+from .models import Offer, Detail, Order, OrderCounter, Review, ReviewStats
+
+
+class ReadOnlyAdmin(admin.ModelAdmin):
+    """Admin for derived data, which is maintained by the app and must not be edited by hand."""
+
+    def has_add_permission(self, request):
+        return False
+
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
 
 admin.site.register(Offer)
 admin.site.register(Detail)
 admin.site.register(Order)
+admin.site.register(OrderCounter, ReadOnlyAdmin)
 admin.site.register(Review)
+admin.site.register(ReviewStats, ReadOnlyAdmin)
@@ -0,0 +1,178 @@
+"""
+Reusable view mixins for the Coderr APIs.
+"""
+
+import hashlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from rest_framework.response import Response
+
+from core.metrics import measure_serialization
+
+class ConditionalRetrieveMixin:
+    """
+    Answer conditional GET requests for a single object with 304 Not Modified.
+
+    The ETag is a hash of the raw column values listed in etag_fields and
+    Last-Modified is the latest of last_modified_fields. Both come from one
+    values_list query, so no object is loaded or serialized to validate a
+    client's cached copy.
+    """
+    etag_fields = ()
+    last_modified_fields = ()
+
+    def get_validator_queryset(self):
+        """
+        Return the values_list query of the validator columns of the requested object.
+
+        It starts from the same filtered get_queryset() as get_object(), so
+        a client never gets a 304 for an object the view would not return.
+        """
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        fields = list(self.etag_fields) + list(self.last_modified_fields)
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        return queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]}).values_list(*fields)
+
+
+    def get_conditional_validators(self):
+        """Return (etag, last_modified timestamp) for the requested object, or None if missing."""
+        return self.build_validators(list(self.get_validator_queryset()))
+
+
+    async def aget_conditional_validators(self):
+        """Same as get_conditional_validators, with the rows loaded by the async ORM."""
+        return self.build_validators([row async for row in self.get_validator_queryset()])
+
+
+    def build_validators(self, rows):
+        """Return (etag, last_modified timestamp) for the validator rows, or None if there are none."""
+        if not rows:
+            return None
+
+        rows.sort(key=repr)
+        renderer = getattr(self.request, 'accepted_renderer', None)
+        fingerprint = repr((self.request.build_absolute_uri('/'), getattr(renderer, 'format', None), rows))
+        etag = quote_etag(hashlib.sha256(fingerprint.encode()).hexdigest())
+
+        timestamps = [value for row in rows for value in row[len(self.etag_fields):] if value is not None]
+        last_modified = int(max(timestamps).timestamp()) if timestamps else None
+        return etag, last_modified
+
+
+    def retrieve(self, request, *args, **kwargs):
+        """Return 304 if the client's copy is current, otherwise the object with validators set."""
+        validators = self.get_conditional_validators()
+        if validators is None:
+            return super().retrieve(request, *args, **kwargs)
+
+        response = self.get_not_modified_response(request, validators)
+        if response is None:
+            response = super().retrieve(request, *args, **kwargs)
+        return self.set_validators(response, validators)
+
+
+    def get_not_modified_response(self, request, validators):
+        """Return a 304 (or 412) response if the request's preconditions allow it, otherwise None."""
+        etag, last_modified = validators
+        return get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+
+    def set_validators(self, response, validators):
+        etag, last_modified = validators
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+
+class AsyncAPIViewMixin:
+    """
+    Dispatch a DRF view or viewset asynchronously.
+
+    Authentication, permission and throttle checks run through
+    sync_to_async, and async handlers are awaited, so a handler can hand
+    blocking work to a thread pool while the event loop keeps serving
+    other requests. Sync handlers, such as the write actions of a viewset
+    whose read actions are async, run through sync_to_async as well.
+    """
+    view_is_async = True
+
+    @classmethod
+    def as_view(cls, *args, **kwargs):
+        """Mark the view function as async; ViewSet.as_view does not."""
+        view = super().as_view(*args, **kwargs)
+        markcoroutinefunction(view)
+        return view
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            if iscoroutinefunction(handler):
+                response = await handler(request, *args, **kwargs)
+            else:
+                response = await sync_to_async(handler)(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+class AsyncReadMixin:
+    """
+    Async counterparts of get_object() and list() for generic views.
+
+    Queries go through the async ORM and the loaded objects are serialized
+    on the event loop, so get_queryset() must preload every relation the
+    serializer reads.
+    """
+
+    async def aget_object(self):
+        """Same as get_object, with the object loaded by the async ORM."""
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            obj = await queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]}).afirst()
+        except (TypeError, ValueError, ValidationError):
+            raise Http404
+        if obj is None:
+            raise Http404(f'No {queryset.model._meta.object_name} matches the given query.')
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+
+    async def alist(self, request, *args, **kwargs):
+        """Same as ListModelMixin.list, with the page loaded by the async ORM."""
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.paginator is not None:
+            page = await self.paginator.apaginate_queryset(queryset, request, view=self)
+            if page is not None:
+                serializer = self.get_serializer(page, many=True)
+                return self.get_paginated_response(serializer.data)
+
+        serializer = self.get_serializer([obj async for obj in queryset], many=True)
+        return Response(serializer.data)
+
+
+class TimedSerializerMixin:
+    """Count the time spent in to_representation as serializer time of the request metrics."""
+
+    def to_representation(self, instance):
+        with measure_serialization():
+            return super().to_representation(instance)
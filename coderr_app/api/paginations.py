@@ -1,11 +1,202 @@
 """
 Defines custom pagination settings for the Coderr app.
+
+Every paginator also offers apaginate_queryset(), which counts and loads
+the page with the async ORM for the async views.
 """
 
-from rest_framework.pagination import PageNumberPagination
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.paginator import InvalidPage
+from django.db.models import F, Q
+
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 class ResultsSetPagination(PageNumberPagination):
     """ Custom pagination class for API results."""
     page_size = 10
     page_size_query_param = 'page_size'
-    max_page_size = 100
\ No newline at end of file
+    max_page_size = 100
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Same as paginate_queryset, with the count and the page loaded by the async ORM."""
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(
+                page_number=page_number, message=str(exc)
+            )
+            raise NotFound(msg)
+
+        self.page.object_list = [obj async for obj in self.page.object_list]
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        return list(self.page)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination over a (field, id) pair.
+
+    The cursor is an opaque token holding the field value and id of the
+    last row of the previous page, so every page is an indexed range scan
+    and no total count is computed. Subclasses define the supported
+    orderings as a mapping from the ordering query value to the model
+    field; a leading '-' sorts descending. NULL values sort as the lowest.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+    orderings = {}
+    default_ordering = None
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Return one page of objects following the cursor in the request."""
+        return self.set_page(list(self.get_page_queryset(queryset, request)))
+
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Same as paginate_queryset, with the page loaded by the async ORM."""
+        return self.set_page([obj async for obj in self.get_page_queryset(queryset, request)])
+
+
+    def get_page_queryset(self, queryset, request):
+        """Return the queryset of the requested page plus one row to detect a next page."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.field, self.descending = self.get_ordering(request)
+
+        queryset = queryset.order_by(*self.get_order_by())
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            value, pk = self.decode_cursor(cursor, queryset.model)
+            queryset = queryset.filter(self.get_position_filter(value, pk))
+        return queryset[:self.page_size + 1]
+
+
+    def set_page(self, results):
+        self.has_next = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        return self.page
+
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data
+        })
+
+
+    def get_page_size(self, request):
+        """Return the requested page size, capped at max_page_size."""
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+
+    def get_ordering(self, request):
+        """Return the ordering field and whether it sorts descending."""
+        ordering = request.query_params.get(self.ordering_query_param) or self.default_ordering
+        if ordering not in self.orderings:
+            raise ValidationError({self.ordering_query_param: f"Invalid ordering parameter: {ordering}"})
+        field = self.orderings[ordering]
+        return field.lstrip('-'), field.startswith('-')
+
+
+    def get_order_by(self):
+        if self.descending:
+            return [F(self.field).desc(nulls_last=True), F('id').desc()]
+        return [F(self.field).asc(nulls_first=True), F('id').asc()]
+
+
+    def get_position_filter(self, value, pk):
+        """Return the filter selecting all rows after the cursor position."""
+        if self.descending:
+            if value is None:
+                return Q(**{f'{self.field}__isnull': True, 'id__lt': pk})
+            return (
+                Q(**{f'{self.field}__lt': value})
+                | Q(**{self.field: value, 'id__lt': pk})
+                | Q(**{f'{self.field}__isnull': True})
+            )
+        if value is None:
+            return Q(**{f'{self.field}__isnull': True, 'id__gt': pk}) | Q(**{f'{self.field}__isnull': False})
+        return Q(**{f'{self.field}__gt': value}) | Q(**{self.field: value, 'id__gt': pk})
+
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        value = getattr(last, self.field)
+        if value is not None and not isinstance(value, (int, float, str)):
+            value = value.isoformat()
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(value, last.pk))
+
+
+    def encode_cursor(self, value, pk):
+        payload = json.dumps([value, pk]).encode()
+        return base64.urlsafe_b64encode(payload).decode()
+
+
+    def decode_cursor(self, cursor, model):
+        """Return the (value, id) position stored in the cursor. Raises NotFound if invalid."""
+        try:
+            value, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            if value is not None:
+                value = model._meta.get_field(self.field).to_python(value)
+            return value, int(pk)
+        except (binascii.Error, UnicodeError, ValueError, TypeError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+
+class OfferCursorPagination(KeysetPagination):
+    """Opt-in keyset pagination for offers, ordered by (created_at, id) or (min_price, id)."""
+    orderings = {
+        'created_at': 'created_at',
+        'min_price': 'min_price'
+    }
+    default_ordering = 'created_at'
+
+
+class OrderCursorPagination(KeysetPagination):
+    """Keyset pagination for orders over (created_at, id), newest first by default."""
+    orderings = {
+        'created_at': 'created_at',
+        '-created_at': '-created_at'
+    }
+    default_ordering = '-created_at'
+
+
+class ReviewCursorPagination(KeysetPagination):
+    """Keyset pagination for reviews over (created_at, id) or (rating, id), newest first by default."""
+    orderings = {
+        'created_at': 'created_at',
+        '-created_at': '-created_at',
+        'rating': 'rating',
+        '-rating': '-rating'
+    }
+    default_ordering = '-created_at'
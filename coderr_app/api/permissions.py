@@ -8,18 +8,39 @@ These permissions check:
 - Existence of Offer Details or Reviews (raises 404 if not found)
 """
 
+from django.core.exceptions import ObjectDoesNotExist
+
 from rest_framework.exceptions import NotFound
 from rest_framework.permissions import BasePermission
 
-from auth_app.models import Profile
-from coderr_app.models import Detail, Review
+from coderr_app.models import Detail
+
+def get_profile_type(request):
+    """
+    Return the profile type of the requesting user, or None if there is none.
+
+    The type is resolved at most once per request and memoized on the
+    request, so all permissions and the view share one lookup. A profile
+    already loaded with the user (see CachedTokenAuthentication) costs
+    no query at all.
+    """
+    if not hasattr(request, '_profile_type'):
+        user = request.user
+        profile_type = None
+        if user and user.is_authenticated:
+            try:
+                profile_type = user.profile.type
+            except ObjectDoesNotExist:
+                pass
+        request._profile_type = profile_type
+    return request._profile_type
+
 
 class IsTypeBusiness(BasePermission):
     """Checks if the user has a business profile."""
     def has_permission(self, request, view):
         """Returns True if the user's profile type is business."""
-        user_type = Profile.objects.get(user=request.user).type
-        return user_type == 'business'
+        return get_profile_type(request) == 'business'
     
 
 class IsTypeBusinessObjPermission(BasePermission):
@@ -29,8 +50,7 @@ class IsTypeBusinessObjPermission(BasePermission):
     """
     def has_object_permission(self, request, view, obj):
         """Returns True if the user's profile type is business."""
-        user_type = Profile.objects.get(user=request.user).type
-        return user_type == 'business'
+        return get_profile_type(request) == 'business'
     
 
 class IsTypeCustomerAndForced404(BasePermission):
@@ -47,16 +67,14 @@ class IsTypeCustomerAndForced404(BasePermission):
                 Detail.objects.get(id=request.data['offer_detail_id'])
             except Detail.DoesNotExist:
                 raise NotFound
-        user_type = Profile.objects.get(user=request.user).type
-        return user_type == 'customer'
+        return get_profile_type(request) == 'customer'
     
 
 class IsTypeCustomer(BasePermission):
     """Checks if the user has a Customer profile."""
     def has_permission(self, request, view):
         """Returns True if the user's profile type is 'customer'."""
-        user_type = Profile.objects.get(user=request.user).type
-        return user_type == 'customer'
+        return get_profile_type(request) == 'customer'
 
 
 class IsSuperOrStaffUser(BasePermission):
@@ -81,13 +99,10 @@ class IsOrderOwner(BasePermission):
     
 
 class IsReviewOwnerAndForced404(BasePermission):
-    """Checks if the user is the reviewer of the Review and exists."""
+    """
+    Checks if the user is the reviewer of the Review.
+    Missing reviews already raise NotFound when the view loads the object.
+    """
     def has_object_permission(self, request, view, obj):
-        """Returns True if the user is the reviewer. Raises NotFound if review ID invalid."""
-        pk = view.kwargs.get('pk')
-        if isinstance(id, int) and pk > 0:
-            try:
-                Review.objects.get(id=pk)
-            except Review.DoesNotExist:
-                raise NotFound
-        return request.user == obj.reviewer
\ No newline at end of file
+        """Returns True if the user is the reviewer of the already loaded review."""
+        return request.user.id == obj.reviewer_id
\ No newline at end of file
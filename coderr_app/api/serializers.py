@@ -7,14 +7,23 @@ representations for API responses.
 
 import os
 
-from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
 from django.utils import timezone
 
 from rest_framework import serializers
 
-from coderr_app.models import Offer, Detail, Order, Review
+from coderr_app.cache import bump_offer_list_version
+from coderr_app.images import schedule_image_processing, delete_image_files, get_variant_url
+from coderr_app.models import Offer, Detail, Order, OrderCounter, Review, ReviewStats
+from .mixins import TimedSerializerMixin
 
-class DetailSerializer(serializers.ModelSerializer):
+REVIEW_UNIQUE_CONSTRAINT = 'unique_review_per_business_user'
+# SQLite names the columns of a failed unique constraint instead of the constraint.
+REVIEW_UNIQUE_COLUMNS = 'coderr_app_review.business_user_id, coderr_app_review.reviewer_id'
+
+DETAIL_UPDATE_FIELDS = ['title', 'revisions', 'delivery_time_in_days', 'price', 'features']
+
+class DetailSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for Offer detail objects."""
     class Meta:
         model = Detail
@@ -39,7 +48,7 @@ class DetailHyperLinkSerializer(serializers.HyperlinkedModelSerializer):
         ]
 
 
-class OfferSerializer(serializers.ModelSerializer):
+class OfferSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for Offers with nested details and custom output."""
     details = DetailSerializer(many=True, write_only=True)
     details_output = DetailHyperLinkSerializer(many=True, read_only=True)
@@ -48,7 +57,7 @@ class OfferSerializer(serializers.ModelSerializer):
     user = serializers.PrimaryKeyRelatedField(read_only=True)
     created_at = serializers.DateTimeField(read_only=True)
     updated_at = serializers.DateTimeField(read_only=True)
-    min_price = serializers.DecimalField(read_only=True, max_digits=10, decimal_places=2)
+    min_price = serializers.FloatField(read_only=True)
     min_delivery_time = serializers.IntegerField(read_only=True)
 
     image = serializers.ImageField(
@@ -75,11 +84,23 @@ class OfferSerializer(serializers.ModelSerializer):
 
     
     def validate_details(self, value):
-        """Ensure exactly 3 details are provided when creating an offer."""
+        """
+        Ensure exactly 3 details are provided when creating an offer.
+
+        On updates every detail must name its offer_type and carry all
+        detail fields, since it replaces the stored detail of that type.
+        """
         view = self.context.get('view')
         if view.action == 'create':
             if len(value) != 3:
                 raise serializers.ValidationError('An offer must contain 3 details!')
+        else:
+            for detail in value:
+                if not detail.get('offer_type'):
+                    raise serializers.ValidationError('Offer type is important!')
+                missing = [field for field in DETAIL_UPDATE_FIELDS if field not in detail]
+                if missing:
+                    raise serializers.ValidationError({field: 'This field is required.' for field in missing})
 
         return value
     
@@ -97,68 +118,72 @@ class OfferSerializer(serializers.ModelSerializer):
 
 
     def create(self, validated_data):
-        """Create offer and nested details."""
+        """Create offer and nested details in one transaction."""
         request = self.context.get("request")
         user = request.user
         created_at = timezone.now()
         updated_at = timezone.now()
-
-        offer = Offer.objects.create(
-            user=user,
-            title=validated_data['title'],
-            image=validated_data['image'],
-            description=validated_data['description'],
-            created_at=created_at,
-            updated_at=updated_at
-        )
-
-        for detail in validated_data['details']:
-            Detail.objects.create(
-                offer=offer,
-                title=detail['title'],
-                revisions=detail['revisions'],
-                delivery_time_in_days=detail['delivery_time_in_days'],
-                price=detail['price'],
-                features=detail['features'],
-                offer_type=detail['offer_type']
+        details = [Detail(**detail) for detail in validated_data['details']]
+
+        with transaction.atomic():
+            offer = Offer.objects.create(
+                user=user,
+                title=validated_data['title'],
+                image=validated_data.get('image'),
+                description=validated_data['description'],
+                created_at=created_at,
+                updated_at=updated_at,
+                min_price=min(detail.price for detail in details),
+                min_delivery_time=min(detail.delivery_time_in_days for detail in details)
             )
-        
+            for detail in details:
+                detail.offer = offer
+            Detail.objects.bulk_create(details)
+            if offer.image:
+                schedule_image_processing(offer, 'image', 'image_variants', on_done=bump_offer_list_version)
+
         return offer
     
 
     def update(self, instance, validated_data):
-        """Update offer fields and nested details; remove old image if replaced."""
+        """
+        Update offer fields and nested details in one transaction.
+
+        Details are matched by offer_type and written with a single
+        bulk_update. The old image and its variants are removed once the
+        update is committed, and the new image is queued for processing.
+        """
         details = validated_data.get('details')
-        if details:
-            for detail in details:
-                if not detail.get('offer_type'):
-                    raise serializers.ValidationError('Offer type is important!')
-                serializer = DetailSerializer(data=detail)
-                serializer.is_valid(raise_exception=True)
-                detail_instance = Detail.objects.get(offer_id=instance.id, offer_type=detail['offer_type'])
-                detail_instance.title = detail['title']
-                detail_instance.revisions = detail['revisions']
-                detail_instance.delivery_time_in_days = detail['delivery_time_in_days']
-                detail_instance.price = detail['price']
-                detail_instance.features = detail['features']
-                detail_instance.save()
-
-        instance.title = validated_data.get('title', instance.title)
-        instance.description = validated_data.get('description', instance.description)
 
-        new_image = validated_data.get('image')
+        with transaction.atomic():
+            if details:
+                stored_details = {detail.offer_type: detail for detail in Detail.objects.filter(offer=instance)}
+                for detail in details:
+                    detail_instance = stored_details.get(detail['offer_type'])
+                    if detail_instance is None:
+                        raise serializers.ValidationError({'details': f"Offer has no {detail['offer_type']} detail."})
+                    for field in DETAIL_UPDATE_FIELDS:
+                        setattr(detail_instance, field, detail[field])
+                Detail.objects.bulk_update(stored_details.values(), DETAIL_UPDATE_FIELDS)
+                instance.min_price = min(detail.price for detail in stored_details.values())
+                instance.min_delivery_time = min(detail.delivery_time_in_days for detail in stored_details.values())
 
+            instance.title = validated_data.get('title', instance.title)
+            instance.description = validated_data.get('description', instance.description)
 
-        if new_image:
-            old_image = instance.image
+            new_image = validated_data.get('image')
 
-            if old_image and old_image.name:
-                old_image.delete(save=False)
 
-            instance.image = new_image
+            if new_image:
+                delete_image_files(instance.image, instance.image_variants)
+                instance.image = new_image
+                instance.image_variants = None
+
+            instance.updated_at = timezone.now()
+            instance.save()
+            if new_image:
+                schedule_image_processing(instance, 'image', 'image_variants', on_done=bump_offer_list_version)
 
-        instance.updated_at = timezone.now()
-        instance.save()
         return instance
 
 
@@ -168,7 +193,7 @@ class OfferSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         view = self.context.get('view')
 
-        user = User.objects.get(id=instance.user.id)
+        user = instance.user
         user_details = {
             'first_name': user.first_name,
             'last_name': user.last_name,
@@ -178,19 +203,7 @@ class OfferSerializer(serializers.ModelSerializer):
         details = instance.details.all()
         details_data = DetailSerializer(details, many=True).data
         details_data_url = DetailHyperLinkSerializer(details, many=True, context={"request": request}).data
-        
-        min_prices = [detail.price for detail in instance.details.all()]
-        min_price = min_prices[0]
-        for price in min_prices:
-            if price < min_price:
-                min_price = price
-        
-        min_delivery_times = [detail.delivery_time_in_days for detail in instance.details.all()]
-        min_delivery_time = min_delivery_times[0]
-        for time in min_delivery_times:
-            if time < min_delivery_time:
-                min_delivery_time = time
-        
+
         ordered = {
             'id': rep.get('id'),
             'user': rep.get('user'),
@@ -200,13 +213,14 @@ class OfferSerializer(serializers.ModelSerializer):
             'created_at': rep.get('created_at'),
             'updated_at': rep.get('updated_at'),
             'details': details_data,
-            'min_price': min_price,
-            'min_delivery_time': min_delivery_time
+            'min_price': rep.get('min_price'),
+            'min_delivery_time': rep.get('min_delivery_time')
         }
 
         if request.method == 'GET':
             ordered['details'] = details_data_url
             if view and getattr(view, 'action', None) == 'list':
+                ordered['image'] = get_variant_url(instance.image, instance.image_variants, request)
                 ordered['user_details'] = user_details
                 
         elif request.method == 'PATCH' or request.method == 'POST':
@@ -219,20 +233,25 @@ class OfferSerializer(serializers.ModelSerializer):
         return ordered
     
 
-class OrderSerializer(serializers.ModelSerializer):
-    """Serializer for Order objects with offer detail fields."""
-    title = serializers.SerializerMethodField()
-    revisions = serializers.SerializerMethodField()
-    delivery_time_in_days = serializers.SerializerMethodField()
-    price = serializers.SerializerMethodField()
-    features = serializers.SerializerMethodField()
-    offer_type = serializers.SerializerMethodField()
+class OrderSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """
+    Serializer for Order objects with offer detail fields.
+
+    Detail fields are read through offer_detail, so querysets should
+    select_related('offer_detail') to render without per-row queries.
+    """
+    title = serializers.CharField(source='offer_detail.title', read_only=True)
+    revisions = serializers.IntegerField(source='offer_detail.revisions', read_only=True)
+    delivery_time_in_days = serializers.IntegerField(source='offer_detail.delivery_time_in_days', read_only=True)
+    price = serializers.FloatField(source='offer_detail.price', read_only=True)
+    features = serializers.JSONField(source='offer_detail.features', read_only=True)
+    offer_type = serializers.CharField(source='offer_detail.offer_type', read_only=True)
     created_at = serializers.DateTimeField(read_only=True)
     updated_at = serializers.DateTimeField(read_only=True)
-    customer_user = serializers.SerializerMethodField()
-    business_user = serializers.SerializerMethodField()
+    customer_user = serializers.IntegerField(source='customer_user_id', read_only=True)
+    business_user = serializers.IntegerField(source='business_user_id', read_only=True)
     offer_detail_id = serializers.PrimaryKeyRelatedField(
-        queryset=Detail.objects.all(),
+        queryset=Detail.objects.select_related('offer'),
         source="offer_detail",
         write_only=True
     )
@@ -257,39 +276,6 @@ class OrderSerializer(serializers.ModelSerializer):
         ]
 
 
-    def get_title(self, obj):
-        return obj.offer_detail.title
-    
-
-    def get_revisions(self, obj):
-        return obj.offer_detail.revisions
-    
-
-    def get_delivery_time_in_days(self, obj):
-        return obj.offer_detail.delivery_time_in_days
-    
-
-    def get_price(self, obj):
-        return obj.offer_detail.price
-    
-
-    def get_features(self, obj):
-        return obj.offer_detail.features
-    
-    
-    def get_customer_user(self, obj):
-        return obj.customer_user.id
-
-
-    def get_business_user(self, obj):
-        offer = Offer.objects.get(id=obj.offer_detail.offer_id)
-        return offer.user.id
-
-
-    def get_offer_type(self, obj):
-        return obj.offer_detail.offer_type
-
-
     def create(self, validated_data):
         """Create order from offer detail."""
         request = self.context.get("request")
@@ -297,41 +283,38 @@ class OrderSerializer(serializers.ModelSerializer):
         created_at = timezone.now()
         updated_at = timezone.now()
         detail = validated_data['offer_detail']
-        offer = Offer.objects.get(id=detail.offer_id)
-
-        order = Order.objects.create(
-            customer_user=user,
-            business_user=offer.user,
-            status='in_progress',
-            offer_detail=detail,
-            created_at=created_at,
-            updated_at=updated_at
-        )
+
+        with transaction.atomic():
+            order = Order.objects.create(
+                customer_user=user,
+                business_user_id=detail.offer.user_id,
+                status='in_progress',
+                offer_detail=detail,
+                created_at=created_at,
+                updated_at=updated_at
+            )
         return order
+
+
+    def update(self, instance, validated_data):
+        """Update the order together with the business user's order counters."""
+        with transaction.atomic():
+            return super().update(instance, validated_data)
     
 
-class OrderCountSerializer(serializers.ModelSerializer):
-    """Serializer to return order counts per business user."""
-    order_count = serializers.SerializerMethodField(read_only=True)
-    completed_order_count = serializers.SerializerMethodField(read_only=True)
+class OrderCountSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """Serializer to return order counts per business user from its counter row."""
+    order_count = serializers.IntegerField(source='in_progress_count', read_only=True)
+    completed_order_count = serializers.IntegerField(source='completed_count', read_only=True)
     class Meta:
-        model = Order
+        model = OrderCounter
         fields = [
             'order_count',
             'completed_order_count'
         ]
-
-    def get_order_count(self, value):
-        pk = self.context.get('pk')
-        return Order.objects.filter(business_user_id=pk, status='in_progress').count()
-    
-
-    def get_completed_order_count(self, value):
-        pk = self.context.get('pk')
-        return Order.objects.filter(business_user_id=pk, status='completed').count()
     
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Review
         fields = [
@@ -350,37 +333,62 @@ class ReviewSerializer(serializers.ModelSerializer):
         ]
 
     def create(self, validated_data):
-        """Create a new review if one does not already exist for the reviewer/business user."""
+        """
+        Create a new review if one does not already exist for the reviewer/business user.
+
+        Duplicates are rejected by the unique constraint on the insert itself,
+        so there is no separate existence check.
+        """
         request = self.context.get("request")
         reviewer = request.user
-        if Review.objects.filter(business_user=validated_data['business_user'], reviewer=reviewer).exists():
-            raise serializers.ValidationError('You have already reviewed this business user!')
         created_at = timezone.now()
         updated_at = timezone.now()
 
-        review = Review.objects.create(
-            reviewer=reviewer,
-            business_user=validated_data['business_user'],
-            created_at=created_at,
-            updated_at=updated_at,
-            description=validated_data['description'],
-            rating=validated_data['rating']
-        )
+        try:
+            with transaction.atomic():
+                review = Review.objects.create(
+                    reviewer=reviewer,
+                    business_user=validated_data['business_user'],
+                    created_at=created_at,
+                    updated_at=updated_at,
+                    description=validated_data['description'],
+                    rating=validated_data['rating']
+                )
+        except IntegrityError as exc:
+            if REVIEW_UNIQUE_CONSTRAINT in str(exc) or REVIEW_UNIQUE_COLUMNS in str(exc):
+                raise serializers.ValidationError('You have already reviewed this business user!')
+            raise
 
         return review
     
 
     def update(self, instance, validated_data):
-        
+        """Update rating and description together with the business user's review stats."""
         instance.rating = validated_data.get('rating', instance.rating)
         instance.description = validated_data.get('description', instance.description)
         instance.updated_at = timezone.now()
-        instance.save()
+        with transaction.atomic():
+            instance.save()
 
         return instance
+
+
+class ReviewStatsSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """Serializer for the rating statistics of a business user."""
+    average_rating = serializers.FloatField(read_only=True)
+    rating_histogram = serializers.DictField(source='histogram', child=serializers.IntegerField(), read_only=True)
+
+    class Meta:
+        model = ReviewStats
+        fields = [
+            'business_user',
+            'review_count',
+            'average_rating',
+            'rating_histogram'
+        ]
     
 
-class BaseInfoSerializer(serializers.Serializer):
+class BaseInfoSerializer(TimedSerializerMixin, serializers.Serializer):
     """Serializer for aggregated base information."""
     review_count = serializers.IntegerField()
     average_rating = serializers.FloatField()
@@ -6,7 +6,7 @@ from django.urls import path, include
 
 from rest_framework import routers
 
-from .views import OfferViewSet, DetailRetrieveView, OrderViewSet, OrderCountView, ReviewViewSet, BaseInfoApiView
+from .views import OfferViewSet, DetailRetrieveView, OrderViewSet, OrderCountView, ReviewViewSet, ReviewStatsView, BaseInfoApiView
 
 router = routers.SimpleRouter()
 router.register(r'offers', OfferViewSet, basename='offers')
@@ -18,5 +18,6 @@ urlpatterns = [
     path('offerdetails/<int:pk>/', DetailRetrieveView.as_view(), name='detail-detail'),
     path('order-count/<int:pk>/', OrderCountView.as_view(), name='orders-detail-in_progress'), 
     path('completed-order-count/<int:pk>/', OrderCountView.as_view(), name='orders-detail-completed'),
+    path('review-stats/<int:pk>/', ReviewStatsView.as_view(), name='review-stats-detail'),
     path('base-info/', BaseInfoApiView.as_view(), name='base_info')
 ]
\ No newline at end of file
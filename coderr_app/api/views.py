@@ -2,11 +2,19 @@
 Views for Offer, Detail, Order, Review, and Base Info APIs.
 
 Includes viewsets for CRUD operations, custom queryset filtering,
-and aggregated base information endpoints.
+and aggregated base information endpoints. The Async* variants serve the
+read endpoints through the async ORM for the ASGI entry point.
 """
 
+from datetime import datetime, time
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.db.models import Q, Avg
+from django.db import connections, router
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 
 from rest_framework import viewsets, generics
 from rest_framework.exceptions import NotFound
@@ -15,25 +23,88 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import MethodNotAllowed, ValidationError
 
-from auth_app.models import Profile
-from coderr_app.models import Offer, Detail, Order, Review
+from auth_app.models import Profile, UserType
+from coderr_app.cache import offer_list_cache_key, get_cached_offer_list, set_cached_offer_list, get_snapshot
+from coderr_app.models import Offer, Detail, Order, OrderCounter, Review, ReviewStats, StatusType
+from coderr_app.search import search_offers
 from .serializers import OfferSerializer, DetailSerializer,\
-    OrderSerializer, OrderCountSerializer, ReviewSerializer, BaseInfoSerializer
+    OrderSerializer, OrderCountSerializer, ReviewSerializer, ReviewStatsSerializer, BaseInfoSerializer
 from .permissions import IsTypeBusiness, IsTypeCustomer, IsTypeCustomerAndForced404,\
-    IsOfferOwner, IsSuperOrStaffUser, IsOrderOwner, IsReviewOwnerAndForced404, IsTypeBusinessObjPermission
-from .paginations import ResultsSetPagination
+    IsOfferOwner, IsSuperOrStaffUser, IsOrderOwner, IsReviewOwnerAndForced404, IsTypeBusinessObjPermission,\
+    get_profile_type
+from .paginations import ResultsSetPagination, OfferCursorPagination, OrderCursorPagination, ReviewCursorPagination
+from .mixins import AsyncAPIViewMixin, AsyncReadMixin, ConditionalRetrieveMixin
 
-class OfferViewSet(viewsets.ModelViewSet):
+def parse_datetime_param(name, value):
+    """
+    Parse an ISO 8601 date or datetime query param into an aware datetime.
+
+    A plain date stands for the start of that day. Raises ValidationError if invalid.
+    """
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            parsed_date = parse_date(value)
+            if parsed_date is not None:
+                parsed = datetime.combine(parsed_date, time.min)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValidationError({name: f"Invalid value: {value}. Must be an ISO 8601 date or datetime."})
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+class OfferViewSet(ConditionalRetrieveMixin, viewsets.ModelViewSet):
     """
     ViewSet for Offers.
 
     Supports listing, creation, update, retrieve, and deletion.
     Provides query param filtering by creator, price, delivery time, and search.
+    Lists are page-numbered by default; pagination=cursor switches to keyset pagination.
+    Retrieve supports conditional GET via ETag and Last-Modified.
     """
 
     serializer_class = OfferSerializer
     queryset = Offer.objects.all()
     pagination_class = ResultsSetPagination
+    cursor_pagination_class = OfferCursorPagination
+    etag_fields = (
+        'user',
+        'title',
+        'image',
+        'description',
+        'created_at',
+        'updated_at',
+        'min_price',
+        'min_delivery_time',
+        'details__id'
+    )
+    last_modified_fields = ('created_at', 'updated_at')
+
+    @property
+    def paginator(self):
+        """Return the cursor paginator if requested, otherwise the page number paginator."""
+        if not hasattr(self, '_paginator'):
+            if self.request.query_params.get('pagination') == 'cursor':
+                self._paginator = self.cursor_pagination_class()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+
+    def list(self, request, *args, **kwargs):
+        """Return the offers list, served from the response cache when possible."""
+        key = offer_list_cache_key(request)
+        data = get_cached_offer_list(key)
+        if data is not None:
+            return Response(data)
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            set_cached_offer_list(key, response.data)
+        return response
+
 
     def get_permissions(self):
         """Return permissions depending on action."""
@@ -52,8 +123,8 @@ class OfferViewSet(viewsets.ModelViewSet):
     
 
     def get_queryset(self):
-        """Return filtered queryset based on query params."""
-        queryset = Offer.objects.all()
+        """Return filtered queryset based on query params, with user and details preloaded."""
+        queryset = Offer.objects.select_related('user').prefetch_related('details')
 
         creator_id_param = self.request.query_params.get('creator_id')
 
@@ -62,7 +133,7 @@ class OfferViewSet(viewsets.ModelViewSet):
 
         min_price_param = self.request.query_params.get('min_price',None)
         if min_price_param:
-            queryset = queryset.filter(details__price__gte=min_price_param)
+            queryset = queryset.filter(min_price__gte=min_price_param)
 
         max_delivery_time_param = self.request.query_params.get('max_delivery_time',None)
         if max_delivery_time_param:
@@ -70,31 +141,77 @@ class OfferViewSet(viewsets.ModelViewSet):
                 max_delivery_time = int(max_delivery_time_param)
             except:
                 raise ValidationError({"max_delivery_time": f"Invalid value: {max_delivery_time_param}. Must be an integer."})
-            queryset = queryset.filter(details__delivery_time_in_days__lte=max_delivery_time)
+            queryset = queryset.filter(min_delivery_time__lte=max_delivery_time)
 
         ordering_param = self.request.query_params.get('ordering',None)
+        search_param = self.request.query_params.get('search',None) 
+        if search_param:
+            queryset = search_offers(queryset, search_param, ranked=ordering_param == 'relevance')
+
         if ordering_param:
             if ordering_param == 'created_at':
                 queryset = queryset.order_by(ordering_param)
             elif ordering_param == 'min_price':
-                queryset = queryset.order_by('details__price')
+                queryset = queryset.order_by('min_price')
+            elif ordering_param == 'relevance':
+                if not search_param:
+                    raise ValidationError({"ordering": "Ordering by relevance requires a search parameter."})
             else:
                 raise ValidationError({"ordering": f"Invalid ordering parameter: {ordering_param}"})
 
-        search_param = self.request.query_params.get('search',None) 
-        if search_param:
-            queryset = queryset.filter(
-                Q(title__icontains=search_param) | Q(description__icontains=search_param)
-            )
-
         return queryset
-    
 
-class DetailRetrieveView(generics.RetrieveAPIView):
-    """Retrieve a single Offer Detail object."""
+
+class AsyncOfferViewSet(AsyncAPIViewMixin, AsyncReadMixin, OfferViewSet):
+    """
+    Offers for the ASGI entry point.
+
+    List and retrieve query through the async ORM, so the worker keeps
+    serving other connections while they wait for the database. Writes
+    run the sync actions in a thread.
+    """
+
+    async def list(self, request, *args, **kwargs):
+        """Return the offers list, served from the response cache when possible."""
+        key = await sync_to_async(offer_list_cache_key)(request)
+        data = await sync_to_async(get_cached_offer_list)(key)
+        if data is not None:
+            return Response(data)
+        response = await self.alist(request, *args, **kwargs)
+        if response.status_code == 200:
+            await sync_to_async(set_cached_offer_list)(key, response.data)
+        return response
+
+
+    async def retrieve(self, request, *args, **kwargs):
+        """Return the offer, or 304 if the client's copy is current."""
+        validators = await self.aget_conditional_validators()
+        if validators is None:
+            return Response(self.get_serializer(await self.aget_object()).data)
+        response = self.get_not_modified_response(request, validators)
+        if response is None:
+            response = Response(self.get_serializer(await self.aget_object()).data)
+        return self.set_validators(response, validators)
+
+
+class DetailRetrieveView(ConditionalRetrieveMixin, generics.RetrieveAPIView):
+    """
+    Retrieve a single Offer Detail object.
+
+    Supports conditional GET via ETag. There is no Last-Modified, since
+    detail writes don't change the timestamps of the offer.
+    """
     permission_classes = [IsAuthenticated]
     serializer_class = DetailSerializer
     queryset = Detail.objects.all()
+    etag_fields = (
+        'title',
+        'revisions',
+        'delivery_time_in_days',
+        'price',
+        'features',
+        'offer_type'
+    )
 
 
 class OrderViewSet(viewsets.ModelViewSet):
@@ -103,26 +220,51 @@ class OrderViewSet(viewsets.ModelViewSet):
 
     Customers can create orders; business users can update them.
     Superusers/staff can access all orders and delete them.
+    Lists are cursor-paginated and filterable by status and creation date.
     """
 
     serializer_class = OrderSerializer
     queryset = Order.objects.all()
+    pagination_class = OrderCursorPagination
 
     def get_queryset(self):
-        """Return orders based on user type."""
+        """Return orders based on user type, with their offer details preloaded."""
         user = self.request.user
-        profile_type = user.profile.type  
+        profile_type = get_profile_type(self.request)
+        queryset = Order.objects.select_related('offer_detail')
         if user.is_superuser or user.is_staff:
-            return Order.objects.all()
+            return self.filter_list(queryset)
 
         if profile_type == "customer":
-            return Order.objects.filter(customer_user=user)
+            return self.filter_list(queryset.filter(customer_user=user))
 
         elif profile_type == "business":
-            return Order.objects.filter(business_user=user)
+            return self.filter_list(queryset.filter(business_user=user))
         
         return Order.objects.none()
 
+
+    def filter_list(self, queryset):
+        """Apply the status and created_after/created_before query params on list requests."""
+        if self.action != 'list':
+            return queryset
+
+        status_param = self.request.query_params.get('status', None)
+        if status_param:
+            if status_param not in StatusType.values:
+                raise ValidationError({"status": f"Invalid status: {status_param}"})
+            queryset = queryset.filter(status=status_param)
+
+        created_after_param = self.request.query_params.get('created_after', None)
+        if created_after_param:
+            queryset = queryset.filter(created_at__gte=parse_datetime_param('created_after', created_after_param))
+
+        created_before_param = self.request.query_params.get('created_before', None)
+        if created_before_param:
+            queryset = queryset.filter(created_at__lte=parse_datetime_param('created_before', created_before_param))
+
+        return queryset
+
     
     def get_permissions(self):
         """Return permissions depending on action."""
@@ -153,18 +295,38 @@ class OrderCountView(APIView):
     GET /orders/<pk>/completed/ returns completed count
     """
 
-    queryset = Order.objects.all()
+    queryset = OrderCounter.objects.all()
     permission_classes = [IsAuthenticated]
     serializer_class = OrderCountSerializer
 
     def get(self, request, pk):
-        if not User.objects.filter(id=pk).exists():
-            raise NotFound
-        in_progress_count = Order.objects.filter(business_user_id=pk, status="in_progress").count()
-        completed_count = Order.objects.filter(business_user_id=pk, status="completed").count()
+        """Read the counts from the business user's counter row; users without orders count zero."""
+        counter = OrderCounter.objects.filter(pk=pk).first()
+        if counter is None:
+            if not User.objects.filter(id=pk).exists():
+                raise NotFound
+            counter = OrderCounter(business_user_id=pk)
+        return self.counter_response(request, counter)
+
+
+    def counter_response(self, request, counter):
+        """Return the in-progress or completed count of the counter, depending on the path."""
+        data = self.serializer_class(counter).data
         if "completed" in request.path:
-            return Response({"completed_order_count": completed_count})
-        return Response({"order_count": in_progress_count})
+            return Response({"completed_order_count": data['completed_order_count']})
+        return Response({"order_count": data['order_count']})
+
+
+class AsyncOrderCountView(AsyncAPIViewMixin, OrderCountView):
+    """Order counts for the ASGI entry point, read through the async ORM."""
+
+    async def get(self, request, pk):
+        counter = await OrderCounter.objects.filter(pk=pk).afirst()
+        if counter is None:
+            if not await User.objects.filter(id=pk).aexists():
+                raise NotFound
+            counter = OrderCounter(business_user_id=pk)
+        return self.counter_response(request, counter)
 
 
 class ReviewViewSet(viewsets.ModelViewSet):
@@ -173,12 +335,25 @@ class ReviewViewSet(viewsets.ModelViewSet):
 
     Customers can create, update, and delete their own reviews.
     Filtering available by business_user_id and reviewer_id.
+    Lists are cursor-paginated and ordered by created_at or rating.
+    With business_user_id and include_stats=true the list also returns
+    that business user's review stats.
     """
     queryset = Review.objects.all()
     serializer_class = ReviewSerializer
+    pagination_class = ReviewCursorPagination
+
+    def list(self, request, *args, **kwargs):
+        """List reviews, optionally together with the business user's stats."""
+        response = super().list(request, *args, **kwargs)
+        business_user_id_param = request.query_params.get('business_user_id', '')
+        if request.query_params.get('include_stats') == 'true' and business_user_id_param.isdigit():
+            response.data['stats'] = ReviewStatsSerializer(get_review_stats(int(business_user_id_param))).data
+        return response
+
 
     def get_queryset(self):
-        """Filter reviews based on query params."""
+        """Filter reviews based on query params; ordering is applied by the paginator."""
         queryset = Review.objects.all()
 
         business_user_id_param = self.request.query_params.get('business_user_id',None)
@@ -189,13 +364,6 @@ class ReviewViewSet(viewsets.ModelViewSet):
         if reviewer_id_param is not None:
             queryset = queryset.filter(reviewer_id=reviewer_id_param)
 
-        ordering_param = self.request.query_params.get('ordering',None)
-        if ordering_param is not None:
-            if ordering_param == 'created_at':
-                queryset = queryset.order_by(ordering_param)
-            elif ordering_param == 'rating':
-                queryset = queryset.order_by('rating')
-
         return queryset
     
 
@@ -218,22 +386,110 @@ class ReviewViewSet(viewsets.ModelViewSet):
     def retrieve(self, request, *args, **kwargs):
         """Disable GET for single reviews."""
         raise MethodNotAllowed('GET')
+
+
+class AsyncReviewViewSet(AsyncAPIViewMixin, AsyncReadMixin, ReviewViewSet):
+    """Reviews for the ASGI entry point; the list queries through the async ORM."""
+
+    async def list(self, request, *args, **kwargs):
+        """List reviews, optionally together with the business user's stats."""
+        response = await self.alist(request, *args, **kwargs)
+        business_user_id_param = request.query_params.get('business_user_id', '')
+        if request.query_params.get('include_stats') == 'true' and business_user_id_param.isdigit():
+            stats = await aget_review_stats(int(business_user_id_param))
+            response.data['stats'] = ReviewStatsSerializer(stats).data
+        return response
     
 
+def get_review_stats(business_user_id):
+    """Return the stats row of a business user, or empty stats if there is none yet."""
+    return ReviewStats.objects.filter(pk=business_user_id).first() or ReviewStats(business_user_id=business_user_id)
+
+
+async def aget_review_stats(business_user_id):
+    """Same as get_review_stats, read through the async ORM."""
+    return await ReviewStats.objects.filter(pk=business_user_id).afirst() or ReviewStats(business_user_id=business_user_id)
+
+
+class ReviewStatsView(APIView):
+    """
+    APIView to return the review statistics of a business user.
+
+    GET /review-stats/<pk>/ returns review count, average rating,
+    and the number of reviews per star rating.
+    """
+
+    queryset = ReviewStats.objects.all()
+    permission_classes = [IsAuthenticated]
+    serializer_class = ReviewStatsSerializer
+
+    def get(self, request, pk):
+        """Read the stats row by primary key; users without reviews get empty stats."""
+        stats = get_review_stats(pk)
+        if stats._state.adding and not User.objects.filter(id=pk).exists():
+            raise NotFound
+        return Response(self.serializer_class(stats).data)
+
+
+def fetch_base_info():
+    """
+    Compute all base info figures with one combined SQL statement.
+
+    The raw query is not routed by Django, so it runs on the database the
+    router picks for reading reviews, a replica when reads go there.
+    """
+    review_table = Review._meta.db_table
+    sql = f"""
+        SELECT
+            (SELECT COUNT(*) FROM {review_table}),
+            (SELECT AVG(rating) FROM {review_table}),
+            (SELECT COUNT(*) FROM {Profile._meta.db_table} WHERE type = %s),
+            (SELECT COUNT(*) FROM {Offer._meta.db_table})
+    """
+    with connections[router.db_for_read(Review)].cursor() as cursor:
+        cursor.execute(sql, [UserType.business])
+        review_count, average_rating, business_profile_count, offer_count = cursor.fetchone()
+    return {
+        "review_count": review_count,
+        "average_rating": average_rating or 0,
+        "business_profile_count": business_profile_count,
+        "offer_count": offer_count,
+    }
+
+
 class BaseInfoApiView(APIView):
     """
     APIView to provide aggregated base information for the dashboard.
 
     Returns review count, average rating, number of business profiles,
-    and number of offers.
+    and number of offers. Served from a cached snapshot that is fresh for
+    BASE_INFO_CACHE_TTL seconds and may be served stale for up to
+    BASE_INFO_CACHE_STALE_TTL more seconds while it is refreshed.
     """
 
+    cache_key = 'base-info:snapshot'
+
     def get(self, request):
-        data = {
-            "review_count": Review.objects.count(),
-            "average_rating": Review.objects.aggregate(avg=Avg("rating"))["avg"] or 0,
-            "business_profile_count": Profile.objects.filter(type='business').count(),
-            "offer_count": Offer.objects.count(),
-        }
-        serializer = BaseInfoSerializer(data)
-        return Response(serializer.data)
\ No newline at end of file
+        return Response(self.get_data())
+
+
+    def get_data(self):
+        return get_snapshot(
+            self.cache_key,
+            lambda: BaseInfoSerializer(fetch_base_info()).data,
+            ttl=getattr(settings, 'BASE_INFO_CACHE_TTL', 5),
+            stale_ttl=getattr(settings, 'BASE_INFO_CACHE_STALE_TTL', 60)
+        )
+
+
+class AsyncBaseInfoApiView(AsyncAPIViewMixin, BaseInfoApiView):
+    """
+    Base info for the ASGI entry point.
+
+    The snapshot lookup may wait for another request's recompute or run
+    the raw SQL statement, neither of which has an async API, so it runs
+    in a thread.
+    """
+
+    async def get(self, request):
+        return Response(await sync_to_async(self.get_data)())
@@ -0,0 +1,173 @@
+"""
+Caching helpers for the public read endpoints.
+
+The offers list response cache keys entries by the normalized query
+parameters and a version stamp. Any write that can change a list
+response bumps the version, so stale entries are never read again and
+simply expire; no key scanning needed. The version only reaches other
+worker processes through a shared cache backend (REDIS_URL); the local
+memory fallback is correct for a single process only.
+
+Snapshots (used by base-info) are time-based instead: they are fresh for
+a TTL, then served stale while one request refreshes them in the
+background, and concurrent misses in a process wait for a single
+recompute.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from core.routers import get_replica_lag, reads_from_replica
+
+logger = logging.getLogger(__name__)
+
+OFFER_LIST_CACHE_PARAMS = (
+    'creator_id',
+    'min_price',
+    'max_delivery_time',
+    'ordering',
+    'search',
+    'page',
+    'page_size',
+    'pagination',
+    'cursor'
+)
+OFFER_LIST_VERSION_KEY = 'offers:list:version'
+OFFER_LIST_HITS_KEY = 'offers:list:hits'
+OFFER_LIST_MISSES_KEY = 'offers:list:misses'
+SNAPSHOT_LOCK_TIMEOUT = 30
+
+_local_locks = {}
+_local_locks_guard = threading.Lock()
+
+
+def get_timeout():
+    """Return the lifetime of cached list responses in seconds."""
+    return getattr(settings, 'OFFER_LIST_CACHE_TIMEOUT', 300)
+
+
+def _incr(key):
+    """Increment a counter in the cache, creating it if missing."""
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        return cache.incr(key)
+
+
+def get_offer_list_version():
+    """Return the current version stamp of the offers list."""
+    version = cache.get(OFFER_LIST_VERSION_KEY)
+    if version is None:
+        cache.add(OFFER_LIST_VERSION_KEY, 1, timeout=None)
+        version = cache.get(OFFER_LIST_VERSION_KEY, 1)
+    return version
+
+
+def bump_offer_list_version():
+    """
+    Invalidate all cached offers list responses.
+
+    Inside a transaction the version is bumped again after commit, so a
+    response cached from pre-commit data in the meantime is dropped too.
+    """
+    _incr(OFFER_LIST_VERSION_KEY)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _incr(OFFER_LIST_VERSION_KEY))
+
+
+def offer_list_cache_key(request):
+    """Build the cache key for an offers list request."""
+    params = []
+    for name in OFFER_LIST_CACHE_PARAMS:
+        value = request.query_params.get(name, '').strip()
+        if value:
+            params.append(f'{name}={value}')
+    raw = '&'.join([request.build_absolute_uri('/')] + params)
+    digest = hashlib.sha256(raw.encode()).hexdigest()
+    return f'offers:list:{get_offer_list_version()}:{digest}'
+
+
+def get_cached_offer_list(key):
+    """Return the cached response data for the key and record a hit or miss."""
+    data = cache.get(key)
+    _incr(OFFER_LIST_HITS_KEY if data is not None else OFFER_LIST_MISSES_KEY)
+    return data
+
+
+def set_cached_offer_list(key, data):
+    """
+    Cache a list response under the key.
+
+    A response read from a replica may miss writes that already bumped
+    the version, so it is only kept for the replication lag.
+    """
+    timeout = get_timeout()
+    if reads_from_replica():
+        timeout = min(timeout, get_replica_lag())
+    cache.set(key, data, timeout=timeout)
+
+
+def get_offer_list_cache_stats():
+    """Return the hit and miss counters of the offers list cache."""
+    return {
+        'hits': cache.get(OFFER_LIST_HITS_KEY, 0),
+        'misses': cache.get(OFFER_LIST_MISSES_KEY, 0)
+    }
+
+
+def _store_snapshot(key, data, ttl, stale_ttl):
+    cache.set(key, {'data': data, 'expires_at': time.time() + ttl}, timeout=ttl + stale_ttl)
+    return data
+
+
+def _refresh_snapshot(key, compute, ttl, stale_ttl, lock_key):
+    """Recompute a snapshot in a worker thread and release the refresh lock."""
+    try:
+        _store_snapshot(key, compute(), ttl, stale_ttl)
+    except Exception:
+        logger.exception('Refreshing snapshot %s failed', key)
+    finally:
+        cache.delete(lock_key)
+        connection.close()
+
+
+def _get_local_lock(key):
+    """Return the process-wide lock guarding the recompute of a snapshot."""
+    with _local_locks_guard:
+        return _local_locks.setdefault(key, threading.Lock())
+
+
+def get_snapshot(key, compute, ttl, stale_ttl):
+    """
+    Return cached data for key, computing it with compute() when needed.
+
+    Fresh data is returned as is. Expired data is returned at once while a
+    single background thread recomputes it (stale-while-revalidate); the
+    refresh lock in the cache keeps other processes from refreshing too.
+    On a miss there is nothing to serve, so concurrent misses in a process
+    block on a lock until the first of them has stored the result, instead
+    of each computing it.
+    """
+    snapshot = cache.get(key)
+    if snapshot is not None:
+        lock_key = f'{key}:lock'
+        if snapshot['expires_at'] <= time.time() and cache.add(lock_key, 1, timeout=SNAPSHOT_LOCK_TIMEOUT):
+            threading.Thread(
+                target=_refresh_snapshot,
+                args=(key, compute, ttl, stale_ttl, lock_key),
+                daemon=True
+            ).start()
+        return snapshot['data']
+
+    with _get_local_lock(key):
+        snapshot = cache.get(key)
+        if snapshot is not None:
+            return snapshot['data']
+        return _store_snapshot(key, compute(), ttl, stale_ttl)
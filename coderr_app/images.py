@@ -0,0 +1,195 @@
+"""
+Background processing for uploaded images.
+
+Uploads are normalized (orientation applied, EXIF stripped, size capped
+and recompressed) and resized into a fixed set of widths by a small
+thread pool once the upload's transaction has committed, so requests
+never wait for Pillow. The generated variants are stored next to the
+original and recorded on the model, and list serializers pick the
+variant that fits their layout.
+"""
+
+import logging
+import os
+
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from PIL import Image, ImageOps
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def get_max_dimension():
+    return getattr(settings, 'IMAGE_MAX_DIMENSION', 2048)
+
+
+def get_variant_widths():
+    return sorted(getattr(settings, 'IMAGE_VARIANT_WIDTHS', (160, 320, 640)))
+
+
+def get_list_variant_width():
+    return getattr(settings, 'IMAGE_LIST_VARIANT_WIDTH', 320)
+
+
+def get_executor():
+    """Return the shared worker pool, creating it on first use."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'IMAGE_PROCESSING_WORKERS', 2),
+            thread_name_prefix='image-processing'
+        )
+    return _executor
+
+
+def schedule_image_processing(instance, field_name, variants_field, on_done=None):
+    """Queue the image of the instance for processing once the current transaction commits."""
+    model, pk = type(instance), instance.pk
+    transaction.on_commit(
+        lambda: get_executor().submit(_run_in_worker, model, pk, field_name, variants_field, on_done)
+    )
+
+
+def delete_image_files(file, variants, keep_original=False):
+    """Delete a stored image and its variants once the current transaction commits."""
+    if not file or not file.name:
+        return
+    storage = file.storage
+    names = list((variants or {}).values())
+    if not keep_original:
+        names.append(file.name)
+    transaction.on_commit(lambda: [storage.delete(name) for name in names])
+
+
+def _run_in_worker(model, pk, field_name, variants_field, on_done):
+    try:
+        process_image(model, pk, field_name, variants_field)
+        if on_done:
+            on_done()
+    except Exception:
+        logger.exception('Processing %s of %s %s failed', field_name, model.__name__, pk)
+    finally:
+        connection.close()
+
+
+def _get_format(name, image):
+    """Return the Pillow format to store an image with the given name in; images with alpha become PNG."""
+    if image.mode in ('RGBA', 'LA'):
+        return 'PNG'
+    image_format = Image.registered_extensions().get(os.path.splitext(name)[1].lower())
+    return image_format if image_format in ('JPEG', 'PNG', 'WEBP') else 'JPEG'
+
+
+def _encode(image, image_format):
+    """Encode an image without metadata, recompressed for the web."""
+    if image_format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    buffer = BytesIO()
+    options = {'quality': 85} if image_format in ('JPEG', 'WEBP') else {}
+    image.save(buffer, format=image_format, optimize=True, **options)
+    return buffer.getvalue()
+
+
+def _save(storage, name, content):
+    """Store content under name or, if it is taken, a free name picked by the storage. Returns the stored name."""
+    return storage.save(name, ContentFile(content))
+
+
+FORMAT_EXTENSIONS = {'JPEG': '.jpg', 'PNG': '.png', 'WEBP': '.webp'}
+
+
+def with_format_extension(name, image_format):
+    """Return name with an extension matching the format, keeping a fitting one (e.g. .jpeg)."""
+    stem, extension = os.path.splitext(name)
+    if Image.registered_extensions().get(extension.lower()) == image_format:
+        return name
+    return stem + FORMAT_EXTENSIONS[image_format]
+
+
+def get_variant_name(name, width, image_format):
+    """
+    Return the storage name of the variant with the given width.
+
+    The whole file name, extension included, is kept, so pic.jpg and
+    pic.png get different variants (variants/pic_jpg_160.jpg and
+    variants/pic_png_160.jpg).
+    """
+    directory, filename = os.path.split(name)
+    stem, extension = os.path.splitext(filename)
+    if extension:
+        stem = f'{stem}_{extension[1:]}'
+    return os.path.join(directory, 'variants', f'{stem}_{width}{FORMAT_EXTENSIONS[image_format]}')
+
+
+def process_image(model, pk, field_name, variants_field):
+    """
+    Normalize the stored image of one object and generate its variants.
+
+    The normalized original and the variants are stored under new names,
+    with extensions matching the encoded format; the storage picks a free
+    name if one is taken, so files of other objects are never touched.
+    The names are saved only if the object still holds the same image,
+    so a newer upload is never overwritten. Then the object's previous
+    original and variants are deleted; if the image changed meanwhile,
+    the new files are deleted instead.
+    """
+    instance = model._default_manager.filter(pk=pk).first()
+    file = getattr(instance, field_name, None)
+    if not file or not file.name:
+        return None
+
+    name, storage = file.name, file.storage
+    old_variants = list((getattr(instance, variants_field) or {}).values())
+    with storage.open(name) as stored:
+        image = Image.open(stored)
+        image.load()
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+
+    max_dimension = get_max_dimension()
+    image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+    image_format = _get_format(name, image)
+    stored_name = _save(storage, with_format_extension(name, image_format), _encode(image, image_format))
+
+    variants = {}
+    for width in get_variant_widths():
+        if width >= image.width:
+            break
+        variant = image.copy()
+        variant.thumbnail((width, max_dimension), Image.LANCZOS)
+        variant_format = 'PNG' if variant.mode in ('RGBA', 'LA') else 'JPEG'
+        variant_name = get_variant_name(stored_name, width, variant_format)
+        variants[str(width)] = _save(storage, variant_name, _encode(variant, variant_format))
+
+    updated = model._default_manager.filter(pk=pk, **{field_name: name}).update(
+        **{field_name: stored_name, variants_field: variants}
+    )
+    for obsolete in [name, *old_variants] if updated else [stored_name, *variants.values()]:
+        storage.delete(obsolete)
+    return variants if updated else None
+
+
+def get_variant_url(file, variants, request, width=None):
+    """
+    Return the URL of the smallest variant at least as wide as width.
+
+    Falls back to the original if no variant is wide enough or the image
+    has not been processed yet.
+    """
+    if not file or not file.name:
+        return None
+    width = width or get_list_variant_width()
+    name = file.name
+    fitting = sorted(int(variant_width) for variant_width in variants or {} if int(variant_width) >= width)
+    if fitting:
+        name = variants[str(fitting[0])]
+    url = file.storage.url(name)
+    return request.build_absolute_uri(url) if request else url
@@ -0,0 +1,173 @@
+"""
+Management command to compare the throughput of the WSGI and ASGI entry points.
+"""
+
+import asyncio
+import statistics
+import time
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from urllib.parse import urlsplit
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+
+from core.asgi import CoderrASGIHandler
+
+class Command(BaseCommand):
+    """
+    Send the same GET requests to the WSGI and the ASGI handler in process.
+
+    The WSGI handler is served by a fixed pool of worker threads, like a
+    threaded WSGI server, and every worker stays blocked until its slow
+    client has read the response. The ASGI handler serves all clients on
+    one event loop and only waits for slow clients between other
+    requests. --client-delay sets how long a client takes to read a
+    response. Requests run against the configured database, so seed it
+    with some data first.
+    """
+    help = 'Benchmark GET requests through the sync WSGI and the async ASGI entry points.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', default=['/api/offers/', '/api/base-info/'], help='Paths to request in turn.')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per entry point.')
+        parser.add_argument('--concurrency', type=int, default=50, help='Number of concurrent clients.')
+        parser.add_argument('--threads', type=int, default=4, help='Worker threads of the WSGI server.')
+        parser.add_argument('--client-delay', type=float, default=0.05, help='Seconds a client takes to read a response.')
+        parser.add_argument('--token', help='Token to authenticate the requests with.')
+        parser.add_argument('--host', default='localhost', help='Host header of the requests.')
+
+
+    def handle(self, *args, **options):
+        requests = [options['paths'][index % len(options['paths'])] for index in range(options['requests'])]
+        headers = {'HTTP_HOST': options['host']}
+        if options['token']:
+            headers['HTTP_AUTHORIZATION'] = f"Token {options['token']}"
+
+        wsgi = self.run_wsgi(requests, headers, options['concurrency'], options['threads'], options['client_delay'])
+        asgi = asyncio.run(self.run_asgi(requests, headers, options['concurrency'], options['client_delay']))
+
+        self.stdout.write(
+            f"{len(requests)} requests, {options['concurrency']} clients, "
+            f"{options['client_delay'] * 1000:.0f} ms client delay"
+        )
+        self.report(f"WSGI ({options['threads']} threads)", *wsgi)
+        self.report('ASGI (1 event loop)', *asgi)
+
+
+    def report(self, name, elapsed, latencies, statuses):
+        failed = sum(1 for status in statuses if status != 200)
+        quantiles = statistics.quantiles(latencies, n=20)
+        self.stdout.write(
+            f'{name}: {len(latencies) / elapsed:.1f} req/s, '
+            f'p50 {quantiles[9] * 1000:.1f} ms, p95 {quantiles[18] * 1000:.1f} ms, '
+            f'{failed} non-200 responses'
+        )
+
+
+    def run_wsgi(self, requests, headers, concurrency, threads, client_delay):
+        """Serve the requests with the WSGI handler on a thread pool. Returns (elapsed, latencies, statuses)."""
+        handler = WSGIHandler()
+        pending = deque(requests)
+        latencies, statuses = [], []
+
+        def serve(path):
+            response_statuses = []
+            environ = self.get_environ(path, headers)
+            b''.join(handler(environ, lambda status, response_headers: response_statuses.append(int(status[:3]))))
+            time.sleep(client_delay)
+            return response_statuses[0]
+
+        def client(workers):
+            while True:
+                try:
+                    path = pending.popleft()
+                except IndexError:
+                    break
+                sent_at = time.perf_counter()
+                statuses.append(workers.submit(serve, path).result())
+                latencies.append(time.perf_counter() - sent_at)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as workers, ThreadPoolExecutor(max_workers=concurrency) as clients:
+            for future in [clients.submit(client, workers) for _ in range(concurrency)]:
+                future.result()
+        return time.perf_counter() - started, latencies, statuses
+
+
+    async def run_asgi(self, requests, headers, concurrency, client_delay):
+        """Serve the requests with the ASGI handler on the event loop. Returns (elapsed, latencies, statuses)."""
+        handler = CoderrASGIHandler()
+        pending = deque(requests)
+        latencies, statuses = [], []
+
+        async def client():
+            while True:
+                try:
+                    path = pending.popleft()
+                except IndexError:
+                    break
+                sent_at = time.perf_counter()
+                statuses.append(await self.call_asgi(handler, path, headers, client_delay))
+                latencies.append(time.perf_counter() - sent_at)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        return time.perf_counter() - started, latencies, statuses
+
+
+    def get_environ(self, path, headers):
+        url = urlsplit(path)
+        return {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': url.path,
+            'QUERY_STRING': url.query,
+            'SERVER_NAME': 'localhost',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': BytesIO(),
+            **headers
+        }
+
+
+    async def call_asgi(self, handler, path, headers, client_delay):
+        """Run one request through the ASGI handler; the client reads the body after client_delay."""
+        url = urlsplit(path)
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': url.path,
+            'raw_path': url.path.encode(),
+            'query_string': url.query.encode(),
+            'root_path': '',
+            'headers': [(name[5:].replace('_', '-').lower().encode(), value.encode()) for name, value in headers.items()],
+            'client': ('127.0.0.1', 0),
+            'server': ('localhost', 80),
+        }
+        done = asyncio.Event()
+        response = {}
+        request_sent = False
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            await done.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                response['status'] = message['status']
+            elif not message.get('more_body'):
+                await asyncio.sleep(client_delay)
+                done.set()
+
+        await handler(scope, receive, send)
+        return response['status']
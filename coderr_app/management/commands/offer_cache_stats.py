@@ -0,0 +1,20 @@
+"""
+Management command to show the offers list cache counters.
+"""
+
+from django.core.management.base import BaseCommand
+
+from coderr_app.cache import get_offer_list_cache_stats, get_offer_list_version
+
+class Command(BaseCommand):
+    """Print hit and miss counters and the current version of the offers list cache."""
+    help = 'Show hit/miss counters of the offers list response cache.'
+
+    def handle(self, *args, **options):
+        stats = get_offer_list_cache_stats()
+        total = stats['hits'] + stats['misses']
+        ratio = stats['hits'] / total if total else 0
+        self.stdout.write(
+            f"hits: {stats['hits']}, misses: {stats['misses']}, "
+            f"hit ratio: {ratio:.1%}, version: {get_offer_list_version()}"
+        )
@@ -0,0 +1,23 @@
+"""
+Management command to rebuild the offer full-text search index.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import connections, DEFAULT_DB_ALIAS
+
+from coderr_app.search import is_supported, rebuild_offer_search_index
+
+class Command(BaseCommand):
+    """Recreate the FTS5 table and triggers and repopulate them from the offers."""
+    help = 'Rebuild the full-text search index for offers.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Database alias to rebuild.')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if not is_supported(connection):
+            self.stdout.write(f'No search index needed for the {connection.vendor} backend.')
+            return
+        rebuild_offer_search_index(connection)
+        self.stdout.write(self.style.SUCCESS('Offer search index rebuilt.'))
@@ -0,0 +1,35 @@
+"""
+Management command to recompute the per-business order counters.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from coderr_app.models import Order, OrderCounter, StatusType
+
+class Command(BaseCommand):
+    """Recompute every OrderCounter row from the orders table and fix any drift."""
+    help = 'Recompute the order counters of all business users from Order.'
+
+    def handle(self, *args, **options):
+        fixed = 0
+        with transaction.atomic():
+            counters = {counter.pk: counter for counter in OrderCounter.objects.select_for_update()}
+            expected = {}
+            rows = Order.objects.values_list('business_user_id', 'status').annotate(count=Count('id')).order_by()
+            for business_user_id, status, count in rows:
+                expected.setdefault(business_user_id, {})[status] = count
+
+            for business_user_id in set(expected) | set(counters):
+                counts = expected.get(business_user_id, {})
+                values = {OrderCounter.count_field(status): counts.get(status, 0) for status in StatusType.values}
+                counter = counters.get(business_user_id)
+                if counter is None:
+                    OrderCounter.recompute(business_user_id)
+                    fixed += 1
+                elif any(getattr(counter, field) != value for field, value in values.items()):
+                    OrderCounter.objects.filter(pk=business_user_id).update(**values)
+                    fixed += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Reconciled order counters, {fixed} fixed.'))
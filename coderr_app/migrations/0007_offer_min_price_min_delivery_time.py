@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-17 05:54
+
+from django.db import migrations, models
+from django.db.models import Min, OuterRef, Subquery
+
+
+def populate_min_values(apps, schema_editor):
+    Offer = apps.get_model('coderr_app', 'Offer')
+    Detail = apps.get_model('coderr_app', 'Detail')
+    details = Detail.objects.filter(offer_id=OuterRef('pk')).values('offer_id')
+    Offer.objects.update(
+        min_price=Subquery(details.annotate(value=Min('price')).values('value')),
+        min_delivery_time=Subquery(details.annotate(value=Min('delivery_time_in_days')).values('value'))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coderr_app', '0006_review'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='offer',
+            name='min_delivery_time',
+            field=models.IntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='offer',
+            name='min_price',
+            field=models.FloatField(blank=True, db_index=True, null=True),
+        ),
+        migrations.RunPython(populate_min_values, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.5 on 2026-10-17 06:20
+
+from django.db import migrations
+
+
+def install_search_index(apps, schema_editor):
+    from coderr_app.search import rebuild_offer_search_index
+    rebuild_offer_search_index(schema_editor.connection)
+
+
+def uninstall_search_index(apps, schema_editor):
+    from coderr_app.search import uninstall_offer_search_index
+    uninstall_offer_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coderr_app', '0007_offer_min_price_min_delivery_time'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
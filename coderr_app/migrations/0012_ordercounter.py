@@ -0,0 +1,38 @@
+# Generated by Django 5.2.5 on 2026-10-17 06:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_order_counters(apps, schema_editor):
+    Order = apps.get_model('coderr_app', 'Order')
+    OrderCounter = apps.get_model('coderr_app', 'OrderCounter')
+    counters = {}
+    rows = Order.objects.values_list('business_user_id', 'status').annotate(count=Count('id')).order_by()
+    for business_user_id, status, count in rows:
+        counter = counters.setdefault(business_user_id, OrderCounter(business_user_id=business_user_id))
+        setattr(counter, f'{status}_count', count)
+    OrderCounter.objects.bulk_create(counters.values())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('coderr_app', '0011_order_list_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderCounter',
+            fields=[
+                ('business_user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='order_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('in_progress_count', models.IntegerField(default=0)),
+                ('completed_count', models.IntegerField(default=0)),
+                ('cancelled_count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(populate_order_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.5 on 2026-10-17 06:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_review_stats(apps, schema_editor):
+    Review = apps.get_model('coderr_app', 'Review')
+    ReviewStats = apps.get_model('coderr_app', 'ReviewStats')
+    stats = {}
+    rows = Review.objects.values_list('business_user_id', 'rating').annotate(count=Count('id')).order_by()
+    for business_user_id, rating, count in rows:
+        row = stats.setdefault(business_user_id, ReviewStats(business_user_id=business_user_id))
+        setattr(row, f'rating_{rating}_count', count)
+        row.review_count += count
+        row.rating_sum += rating * count
+    ReviewStats.objects.bulk_create(stats.values())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('coderr_app', '0012_ordercounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewStats',
+            fields=[
+                ('business_user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='review_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('review_count', models.IntegerField(default=0)),
+                ('rating_sum', models.IntegerField(default=0)),
+                ('rating_1_count', models.IntegerField(default=0)),
+                ('rating_2_count', models.IntegerField(default=0)),
+                ('rating_3_count', models.IntegerField(default=0)),
+                ('rating_4_count', models.IntegerField(default=0)),
+                ('rating_5_count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(populate_review_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.5 on 2026-10-17 06:14
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def check_duplicate_reviews(apps, schema_editor):
+    """Refuse to add the constraint while a customer reviewed a business user twice, listing the pairs to resolve."""
+    Review = apps.get_model('coderr_app', 'Review')
+    duplicates = (
+        Review.objects.values('business_user_id', 'reviewer_id')
+        .annotate(count=Count('id'))
+        .filter(count__gt=1)
+        .values_list('business_user_id', 'reviewer_id')
+        .order_by()
+    )
+    duplicates = [f'(business_user {business_user_id}, reviewer {reviewer_id})' for business_user_id, reviewer_id in duplicates]
+    if duplicates:
+        raise RuntimeError(f"Reviews exist more than once for these pairs, resolve them before migrating: {', '.join(duplicates)}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coderr_app', '0013_reviewstats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_reviews, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='review',
+            constraint=models.UniqueConstraint(fields=('business_user', 'reviewer'), name='unique_review_per_business_user'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.5 on 2026-10-17 11:40
+
+from django.db import migrations
+
+STATUSES = ('in_progress', 'completed', 'cancelled')
+
+POSTGRESQL_INDEXES = [
+    ('offer_title_trgm_idx', 'coderr_app_offer USING gin (UPPER(title::text) gin_trgm_ops)'),
+    ('offer_description_trgm_idx', 'coderr_app_offer USING gin (UPPER(description::text) gin_trgm_ops)'),
+] + [
+    (f'order_{status}_business_idx', f"coderr_app_order (business_user_id, created_at) WHERE status = '{status}'")
+    for status in STATUSES
+] + [
+    (f'order_{status}_customer_idx', f"coderr_app_order (customer_user_id, created_at) WHERE status = '{status}'")
+    for status in STATUSES
+]
+
+
+def create_postgresql_indexes(apps, schema_editor):
+    """
+    Create the trigram search indexes and the partial order indexes on PostgreSQL only.
+
+    CREATE EXTENSION needs a superuser, or, since pg_trgm is a trusted
+    extension (PostgreSQL 13+), a role with CREATE on the database. With
+    neither, have an administrator run CREATE EXTENSION pg_trgm first;
+    IF NOT EXISTS then skips it.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, definition in POSTGRESQL_INDEXES:
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {definition}')
+
+
+def drop_postgresql_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, definition in POSTGRESQL_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coderr_app', '0015_review_list_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_postgresql_indexes, drop_postgresql_indexes),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.5 on 2026-10-17 16:10
+
+from django.db import migrations
+
+
+def install_min_values_triggers(apps, schema_editor):
+    from coderr_app.min_values import rebuild_offer_min_values
+    rebuild_offer_min_values(schema_editor.connection)
+
+
+def uninstall_min_values_triggers(apps, schema_editor):
+    from coderr_app.min_values import uninstall_offer_min_values_triggers
+    uninstall_offer_min_values_triggers(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coderr_app', '0016_postgresql_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_min_values_triggers, uninstall_min_values_triggers),
+    ]
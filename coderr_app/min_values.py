@@ -0,0 +1,115 @@
+"""
+Database triggers for the minimum values of offers.
+
+Offer.min_price and Offer.min_delivery_time mirror the cheapest and
+fastest detail of the offer. On SQLite and PostgreSQL, triggers on the
+detail table recalculate them, so every write path (save, update, bulk
+operations and raw SQL) is covered. On PostgreSQL the trigger locks the
+offer row before recalculating, so concurrent detail writes of the same
+offer can't overwrite each other's result. Other databases fall back to
+the Detail save and delete signals.
+"""
+
+from django.db import connection
+
+from coderr_app.models import Offer, Detail
+
+OFFER_TABLE = Offer._meta.db_table
+DETAIL_TABLE = Detail._meta.db_table
+TRIGGER_PREFIX = f'{DETAIL_TABLE}_offer_min_values'
+
+SET_MIN_VALUES = f"""
+    UPDATE {OFFER_TABLE} SET
+        min_price = (SELECT MIN(price) FROM {DETAIL_TABLE} WHERE offer_id = {OFFER_TABLE}.id),
+        min_delivery_time = (SELECT MIN(delivery_time_in_days) FROM {DETAIL_TABLE} WHERE offer_id = {OFFER_TABLE}.id)
+"""
+
+SQLITE_SQL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TRIGGER_PREFIX}_ai AFTER INSERT ON {DETAIL_TABLE} BEGIN
+        {SET_MIN_VALUES} WHERE id = new.offer_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TRIGGER_PREFIX}_ad AFTER DELETE ON {DETAIL_TABLE} BEGIN
+        {SET_MIN_VALUES} WHERE id = old.offer_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TRIGGER_PREFIX}_au
+    AFTER UPDATE OF offer_id, price, delivery_time_in_days ON {DETAIL_TABLE} BEGIN
+        {SET_MIN_VALUES} WHERE id IN (old.offer_id, new.offer_id);
+    END
+    """,
+]
+
+DROP_SQLITE_SQL = [
+    f"DROP TRIGGER IF EXISTS {TRIGGER_PREFIX}_ai",
+    f"DROP TRIGGER IF EXISTS {TRIGGER_PREFIX}_ad",
+    f"DROP TRIGGER IF EXISTS {TRIGGER_PREFIX}_au",
+]
+
+POSTGRESQL_SQL = [
+    f"""
+    CREATE OR REPLACE FUNCTION {TRIGGER_PREFIX}() RETURNS trigger AS $$
+    DECLARE
+        offer_ids bigint[];
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            offer_ids := ARRAY[NEW.offer_id];
+        ELSIF TG_OP = 'DELETE' THEN
+            offer_ids := ARRAY[OLD.offer_id];
+        ELSE
+            offer_ids := ARRAY[OLD.offer_id, NEW.offer_id];
+        END IF;
+        PERFORM 1 FROM {OFFER_TABLE} WHERE id = ANY(offer_ids) ORDER BY id FOR NO KEY UPDATE;
+        {SET_MIN_VALUES} WHERE id = ANY(offer_ids);
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    f"DROP TRIGGER IF EXISTS {TRIGGER_PREFIX} ON {DETAIL_TABLE}",
+    f"""
+    CREATE TRIGGER {TRIGGER_PREFIX}
+    AFTER INSERT OR DELETE OR UPDATE OF offer_id, price, delivery_time_in_days ON {DETAIL_TABLE}
+    FOR EACH ROW EXECUTE FUNCTION {TRIGGER_PREFIX}()
+    """,
+]
+
+DROP_POSTGRESQL_SQL = [
+    f"DROP TRIGGER IF EXISTS {TRIGGER_PREFIX} ON {DETAIL_TABLE}",
+    f"DROP FUNCTION IF EXISTS {TRIGGER_PREFIX}()",
+]
+
+INSTALL_SQL = {'sqlite': SQLITE_SQL, 'postgresql': POSTGRESQL_SQL}
+UNINSTALL_SQL = {'sqlite': DROP_SQLITE_SQL, 'postgresql': DROP_POSTGRESQL_SQL}
+
+
+def is_supported(using=connection):
+    """Return True if the database connection keeps the minimum values with triggers."""
+    return using.vendor in INSTALL_SQL
+
+
+def install_offer_min_values_triggers(using=connection):
+    """Create the triggers on the detail table if they are missing."""
+    if not is_supported(using):
+        return
+    with using.cursor() as cursor:
+        for statement in INSTALL_SQL[using.vendor]:
+            cursor.execute(statement)
+
+
+def uninstall_offer_min_values_triggers(using=connection):
+    """Drop the triggers on the detail table."""
+    if not is_supported(using):
+        return
+    with using.cursor() as cursor:
+        for statement in UNINSTALL_SQL[using.vendor]:
+            cursor.execute(statement)
+
+
+def rebuild_offer_min_values(using=connection):
+    """Recreate missing triggers and recalculate the minimum values of all offers."""
+    install_offer_min_values_triggers(using)
+    with using.cursor() as cursor:
+        cursor.execute(SET_MIN_VALUES)
@@ -5,7 +5,8 @@ Defines the data structure for marketplace logic including
 offer listings, pricing tiers, orders, and business reviews.
 """
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F, Min, OuterRef, Subquery
 from django.contrib.auth.models import User
 
 class DetailType(models.TextChoices):
@@ -15,14 +16,43 @@ class DetailType(models.TextChoices):
     premium = 'premium', "Premium"
 
 
+class OfferQuerySet(models.QuerySet):
+    """QuerySet with helpers to maintain the denormalized detail minimums."""
+
+    def update_min_values(self):
+        """Recalculate min_price and min_delivery_time from the details in one UPDATE."""
+        details = Detail.objects.filter(offer_id=OuterRef('pk')).values('offer_id')
+        return self.update(
+            min_price=Subquery(details.annotate(value=Min('price')).values('value')),
+            min_delivery_time=Subquery(details.annotate(value=Min('delivery_time_in_days')).values('value'))
+        )
+
+
 class Offer(models.Model):
-    """Represents a general service or product offer."""
+    """
+    Represents a general service or product offer.
+
+    min_price and min_delivery_time mirror the cheapest and fastest detail.
+    Database triggers keep them in sync on every detail write, see
+    coderr_app.min_values.
+    """
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='offer')
     title = models.CharField(max_length=50)
     image = models.ImageField(upload_to='offer_images/', blank=True, null=True)
+    image_variants = models.JSONField(blank=True, null=True)
     description = models.TextField()
     created_at = models.DateTimeField()
     updated_at = models.DateTimeField(blank=True, null=True)
+    min_price = models.FloatField(blank=True, null=True, db_index=True)
+    min_delivery_time = models.IntegerField(blank=True, null=True, db_index=True)
+
+    objects = OfferQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='offer_created_at_id_idx'),
+            models.Index(fields=['min_price', 'id'], name='offer_min_price_id_idx'),
+        ]
 
 
     def __str__(self):
@@ -59,11 +89,89 @@ class Order(models.Model):
     updated_at = models.DateTimeField(blank=True, null=True)
     offer_detail = models.ForeignKey(Detail, on_delete=models.CASCADE, related_name='order')
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['business_user', 'status', 'created_at'], name='order_business_status_idx'),
+            models.Index(fields=['customer_user', 'created_at'], name='order_customer_created_idx'),
+        ]
+
 
     def __str__(self):
          return f"Order {self.id} - From customer {self.customer_user.id} to business {self.business_user.id}"
 
 
+class OrderCounter(models.Model):
+    """
+    Materialized order counts per business user, one column per status.
+
+    Maintained by the Order signal handlers within the writing transaction;
+    the reconcile_order_counters command recomputes them from Order.
+    """
+    business_user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='order_counter')
+    in_progress_count = models.IntegerField(default=0)
+    completed_count = models.IntegerField(default=0)
+    cancelled_count = models.IntegerField(default=0)
+
+
+    def __str__(self):
+         return f"Order counts of business {self.business_user_id}"
+
+
+    @staticmethod
+    def count_field(status):
+        """Return the name of the counter column for a status."""
+        return f"{status}_count"
+
+
+    @classmethod
+    def insert_empty(cls, business_user_id):
+        """Insert a zeroed counter row unless one exists, so there is always a row to update and lock."""
+        cls.objects.bulk_create([cls(business_user_id=business_user_id)], ignore_conflicts=True)
+
+
+    @classmethod
+    def adjust(cls, business_user_id, changes, create_missing=True):
+        """
+        Apply per-status deltas to a business user's counters in one UPDATE.
+
+        If the counter row does not exist yet, a zeroed row is inserted
+        first and the deltas are applied to it. Concurrent first orders
+        insert at most one row and their UPDATEs queue on its lock, so
+        none of them is lost.
+        """
+        values = {
+            cls.count_field(status): F(cls.count_field(status)) + delta
+            for status, delta in changes.items() if delta
+        }
+        if not values:
+            return
+        if not cls.objects.filter(pk=business_user_id).update(**values) and create_missing:
+            cls.insert_empty(business_user_id)
+            cls.objects.filter(pk=business_user_id).update(**values)
+
+
+    @classmethod
+    def recompute(cls, business_user_id):
+        """
+        Recalculate a business user's counters from the orders table.
+
+        The counter row is inserted if missing and locked before counting,
+        so adjustments made by concurrent order writes wait and apply on
+        top of the new values.
+        """
+        with transaction.atomic():
+            cls.insert_empty(business_user_id)
+            counter = cls.objects.select_for_update().get(pk=business_user_id)
+            counts = dict(
+                Order.objects.filter(business_user_id=business_user_id)
+                .values_list('status').annotate(count=Count('id')).order_by()
+            )
+            for status in StatusType.values:
+                setattr(counter, cls.count_field(status), counts.get(status, 0))
+            counter.save()
+        return counter
+
+
 class Rating(models.IntegerChoices):
         """Enumeration of rating values (1–5 stars)."""
         ONE = 1, "⭐️"
@@ -82,6 +190,108 @@ class Review(models.Model):
     created_at = models.DateTimeField()
     updated_at = models.DateTimeField(blank=True, null=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['business_user', 'reviewer'], name='unique_review_per_business_user'),
+        ]
+        indexes = [
+            models.Index(fields=['business_user', 'created_at'], name='review_business_created_idx'),
+            models.Index(fields=['business_user', 'rating'], name='review_business_rating_idx'),
+            models.Index(fields=['reviewer', 'created_at'], name='review_reviewer_created_idx'),
+            models.Index(fields=['reviewer', 'rating'], name='review_reviewer_rating_idx'),
+            models.Index(fields=['created_at'], name='review_created_idx'),
+            models.Index(fields=['rating'], name='review_rating_idx'),
+        ]
+
 
     def __str__(self):
-         return f"Review {self.id} - From {self.reviewer.id} to {self.business_user.id}"
\ No newline at end of file
+         return f"Review {self.id} - From {self.reviewer.id} to {self.business_user.id}"
+
+
+class ReviewStats(models.Model):
+    """
+    Incrementally maintained rating statistics per business user.
+
+    Holds the review count, the rating sum and a 1–5 star histogram,
+    updated by the Review signal handlers within the writing transaction.
+    """
+    business_user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='review_stats')
+    review_count = models.IntegerField(default=0)
+    rating_sum = models.IntegerField(default=0)
+    rating_1_count = models.IntegerField(default=0)
+    rating_2_count = models.IntegerField(default=0)
+    rating_3_count = models.IntegerField(default=0)
+    rating_4_count = models.IntegerField(default=0)
+    rating_5_count = models.IntegerField(default=0)
+
+
+    def __str__(self):
+         return f"Review stats of business {self.business_user_id}"
+
+
+    @property
+    def average_rating(self):
+        """Return the average rating, or 0 without reviews."""
+        return self.rating_sum / self.review_count if self.review_count else 0
+
+
+    @property
+    def histogram(self):
+        """Return the number of reviews per star rating."""
+        return {rating: getattr(self, self.rating_field(rating)) for rating in Rating.values}
+
+
+    @staticmethod
+    def rating_field(rating):
+        """Return the name of the histogram column for a rating."""
+        return f"rating_{rating}_count"
+
+
+    @classmethod
+    def insert_empty(cls, business_user_id):
+        """Insert a zeroed stats row unless one exists, so there is always a row to update and lock."""
+        cls.objects.bulk_create([cls(business_user_id=business_user_id)], ignore_conflicts=True)
+
+
+    @classmethod
+    def adjust(cls, business_user_id, rating, delta, create_missing=True):
+        """
+        Add (delta=1) or remove (delta=-1) one rating in a single UPDATE.
+
+        If the stats row does not exist yet, a zeroed row is inserted
+        first and the change is applied to it. Concurrent first reviews
+        insert at most one row and their UPDATEs queue on its lock, so
+        none of them is lost.
+        """
+        values = {
+            'review_count': F('review_count') + delta,
+            'rating_sum': F('rating_sum') + delta * rating,
+            cls.rating_field(rating): F(cls.rating_field(rating)) + delta
+        }
+        if not cls.objects.filter(pk=business_user_id).update(**values) and create_missing:
+            cls.insert_empty(business_user_id)
+            cls.objects.filter(pk=business_user_id).update(**values)
+
+
+    @classmethod
+    def recompute(cls, business_user_id):
+        """
+        Recalculate a business user's stats from the reviews table.
+
+        The stats row is inserted if missing and locked before counting,
+        so adjustments made by concurrent review writes wait and apply on
+        top of the new values.
+        """
+        with transaction.atomic():
+            cls.insert_empty(business_user_id)
+            stats = cls.objects.select_for_update().get(pk=business_user_id)
+            counts = dict(
+                Review.objects.filter(business_user_id=business_user_id)
+                .values_list('rating').annotate(count=Count('id')).order_by()
+            )
+            for rating in Rating.values:
+                setattr(stats, cls.rating_field(rating), counts.get(rating, 0))
+            stats.review_count = sum(counts.values())
+            stats.rating_sum = sum(rating * count for rating, count in counts.items())
+            stats.save()
+        return stats
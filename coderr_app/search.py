@@ -0,0 +1,156 @@
+"""
+Full-text search for offers.
+
+On SQLite the offers are indexed in an FTS5 virtual table that mirrors
+Offer.title and Offer.description. Triggers on the offer table keep the
+index in sync, so every write path (save, update, bulk operations and
+raw SQL) is covered. On PostgreSQL every word is matched as a
+case-insensitive substring, served by trigram GIN indexes, and results
+are ranked by trigram similarity. Other databases fall back to a
+case-insensitive substring search of the whole term.
+"""
+
+import re
+
+from django.db import connection, connections
+from django.db.models import Q, TextField, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Concat
+
+from coderr_app.models import Offer
+
+OFFER_TABLE = Offer._meta.db_table
+OFFER_FTS_TABLE = f'{OFFER_TABLE}_fts'
+
+OFFER_FTS_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {OFFER_FTS_TABLE} USING fts5(
+        title, description, content='{OFFER_TABLE}', content_rowid='id'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {OFFER_FTS_TABLE}_ai AFTER INSERT ON {OFFER_TABLE} BEGIN
+        INSERT INTO {OFFER_FTS_TABLE}(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {OFFER_FTS_TABLE}_ad AFTER DELETE ON {OFFER_TABLE} BEGIN
+        INSERT INTO {OFFER_FTS_TABLE}({OFFER_FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {OFFER_FTS_TABLE}_au AFTER UPDATE OF title, description ON {OFFER_TABLE} BEGIN
+        INSERT INTO {OFFER_FTS_TABLE}({OFFER_FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO {OFFER_FTS_TABLE}(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+]
+
+DROP_OFFER_FTS_SQL = [
+    f"DROP TRIGGER IF EXISTS {OFFER_FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {OFFER_FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {OFFER_FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {OFFER_FTS_TABLE}",
+]
+
+
+def is_supported(using=connection):
+    """Return True if the database connection provides the FTS5 index."""
+    return using.vendor == 'sqlite'
+
+
+def install_offer_search_index(using=connection):
+    """Create the FTS5 table and its sync triggers if they are missing."""
+    if not is_supported(using):
+        return
+    with using.cursor() as cursor:
+        for statement in OFFER_FTS_SQL:
+            cursor.execute(statement)
+
+
+def uninstall_offer_search_index(using=connection):
+    """Drop the FTS5 table and its sync triggers."""
+    if not is_supported(using):
+        return
+    with using.cursor() as cursor:
+        for statement in DROP_OFFER_FTS_SQL:
+            cursor.execute(statement)
+
+
+def rebuild_offer_search_index(using=connection):
+    """Recreate missing index objects and repopulate the index from the offer table."""
+    install_offer_search_index(using)
+    if not is_supported(using):
+        return
+    with using.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {OFFER_FTS_TABLE}({OFFER_FTS_TABLE}) VALUES ('rebuild')")
+
+
+def build_match_query(term):
+    """
+    Turn free user input into a safe FTS5 MATCH expression.
+
+    Every word is quoted and used as a prefix, so FTS5 operators in the
+    input are treated as plain text. Returns an empty string if the input
+    contains no words.
+    """
+    tokens = re.findall(r'\w+', term)
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def search_offers_postgresql(queryset, term, ranked=False):
+    """
+    Filter offers containing every word of the term in title or description.
+
+    The icontains lookups compare UPPER(column) and are served by the
+    trigram GIN indexes of migration 0016. TrigramSimilarity is imported
+    here, since django.contrib.postgres needs psycopg, which SQLite-only
+    installs don't have.
+    """
+    from django.contrib.postgres.search import TrigramSimilarity
+
+    tokens = re.findall(r'\w+', term) or [term]
+    for token in tokens:
+        queryset = queryset.filter(Q(title__icontains=token) | Q(description__icontains=token))
+    if ranked:
+        queryset = queryset.annotate(
+            search_rank=TrigramSimilarity(Concat('title', Value(' '), 'description', output_field=TextField()), term)
+        ).order_by('-search_rank', 'id')
+    return queryset
+
+
+def search_offers(queryset, term, ranked=False):
+    """
+    Filter an offer queryset by a search term.
+
+    If ranked is True, the result is ordered by relevance (best match
+    first) where the database supports it: BM25 on SQLite, trigram
+    similarity on PostgreSQL. The branch follows the database the
+    queryset reads from, which may be a replica.
+
+    On SQLite words match from their start ("off" finds "Offer"), not
+    anywhere inside a word ("ffer" does not).
+    """
+    using = connections[queryset.db]
+    if using.vendor == 'postgresql':
+        return search_offers_postgresql(queryset, term, ranked)
+
+    match = build_match_query(term)
+    if not is_supported(using) or not match:
+        return queryset.filter(Q(title__icontains=term) | Q(description__icontains=term))
+
+    queryset = queryset.filter(id__in=RawSQL(
+        f"SELECT rowid FROM {OFFER_FTS_TABLE} WHERE {OFFER_FTS_TABLE} MATCH %s",
+        (match,)
+    ))
+    if ranked:
+        queryset = queryset.annotate(search_rank=RawSQL(
+            f"SELECT bm25({OFFER_FTS_TABLE}) FROM {OFFER_FTS_TABLE} "
+            f"WHERE {OFFER_FTS_TABLE} MATCH %s AND rowid = {OFFER_TABLE}.id",
+            (match,)
+        )).order_by('search_rank', 'id')
+    return queryset
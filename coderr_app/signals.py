@@ -0,0 +1,102 @@
+"""
+Signal handlers for the Coderr app.
+
+Keeps the denormalized minimum values on Offer in sync with its details
+on databases without the min values triggers, maintains the per-business
+order counters and review statistics, and invalidates the cached offers
+list when its content changes.
+"""
+
+from django.contrib.auth.models import User
+from django.db.models.signals import post_init, post_save, post_delete
+from django.db import connections
+from django.dispatch import receiver
+
+from coderr_app import min_values
+from coderr_app.cache import bump_offer_list_version
+from coderr_app.models import Offer, Detail, Order, OrderCounter, Review, ReviewStats
+
+USER_NAME_FIELDS = {'username', 'first_name', 'last_name'}
+
+@receiver(post_save, sender=Detail)
+@receiver(post_delete, sender=Detail)
+def update_offer_min_values(sender, instance, using, **kwargs):
+    """
+    Recalculate the offer's min_price and min_delivery_time after a detail write.
+
+    Only on databases without the min values triggers, which also cover
+    bulk operations.
+    """
+    if not min_values.is_supported(connections[using]):
+        Offer.objects.using(using).filter(pk=instance.offer_id).update_min_values()
+
+
+@receiver(post_save, sender=Offer)
+@receiver(post_delete, sender=Offer)
+@receiver(post_save, sender=Detail)
+@receiver(post_delete, sender=Detail)
+def invalidate_offer_list_cache(sender, **kwargs):
+    """Invalidate the cached offers list after an offer or detail write."""
+    bump_offer_list_version()
+
+
+@receiver(post_save, sender=User)
+def invalidate_offer_list_cache_for_owner(sender, instance, update_fields=None, **kwargs):
+    """Invalidate the cached offers list if the name of an offer owner may have changed."""
+    if update_fields is not None and not USER_NAME_FIELDS.intersection(update_fields):
+        return
+    if Offer.objects.filter(user_id=instance.pk).exists():
+        bump_offer_list_version()
+
+
+@receiver(post_init, sender=Order)
+def remember_order_status(sender, instance, **kwargs):
+    """Remember the loaded status to detect status changes on save."""
+    instance._loaded_status = instance.__dict__.get('status')
+
+
+@receiver(post_save, sender=Order)
+def count_saved_order(sender, instance, created, update_fields=None, **kwargs):
+    """Update the business user's order counters after an order is created or changes status."""
+    if created:
+        OrderCounter.adjust(instance.business_user_id, {instance.status: 1})
+    elif update_fields is None or 'status' in update_fields:
+        old_status = instance._loaded_status
+        if old_status != instance.status:
+            changes = {instance.status: 1}
+            if old_status:
+                changes[old_status] = -1
+            OrderCounter.adjust(instance.business_user_id, changes)
+    instance._loaded_status = instance.status
+
+
+@receiver(post_delete, sender=Order)
+def count_deleted_order(sender, instance, **kwargs):
+    """Update the business user's order counters after an order is deleted."""
+    OrderCounter.adjust(instance.business_user_id, {instance.status: -1}, create_missing=False)
+
+
+@receiver(post_init, sender=Review)
+def remember_review_rating(sender, instance, **kwargs):
+    """Remember the loaded business user and rating to detect changes on save."""
+    instance._loaded_rating = (instance.__dict__.get('business_user_id'), instance.__dict__.get('rating'))
+
+
+@receiver(post_save, sender=Review)
+def count_saved_review(sender, instance, created, **kwargs):
+    """Update the review statistics after a review is created or its rating changes."""
+    current = (instance.business_user_id, instance.rating)
+    if created:
+        ReviewStats.adjust(instance.business_user_id, instance.rating, 1)
+    elif instance._loaded_rating != current:
+        old_business_user_id, old_rating = instance._loaded_rating
+        if old_business_user_id and old_rating:
+            ReviewStats.adjust(old_business_user_id, old_rating, -1, create_missing=False)
+        ReviewStats.adjust(instance.business_user_id, instance.rating, 1)
+    instance._loaded_rating = current
+
+
+@receiver(post_delete, sender=Review)
+def count_deleted_review(sender, instance, **kwargs):
+    """Update the review statistics after a review is deleted."""
+    ReviewStats.adjust(instance.business_user_id, instance.rating, -1, create_missing=False)
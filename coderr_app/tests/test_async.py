@@ -0,0 +1,102 @@
+"""
+Tests for the async read endpoints of the ASGI entry point.
+
+The async views must answer exactly like their sync counterparts.
+"""
+
+from asgiref.sync import iscoroutinefunction
+
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import resolve, reverse
+
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from auth_app.tests.utils import (
+    create_test_user,
+    create_test_users_token,
+    create_test_users_profile,
+    delete_test_images
+    )
+from .utils import create_offer, create_detail_set
+
+
+@override_settings(ROOT_URLCONF='core.asgi_urls')
+class AsyncReadTests(APITestCase):
+    """Compare the async views with the sync views of core.urls."""
+
+    def setUp(self):
+        """Create a business user with two offers and a customer with an order and a review."""
+        self.business = create_test_user()
+        self.business_token = create_test_users_token(self.business)
+        create_test_users_profile(self.business)
+        self.offer = create_offer(self.business)
+        details = create_detail_set(self.offer.id)
+        create_detail_set(create_offer(self.business).id)
+
+        self.customer = create_test_user(username='customer')
+        self.customer_token = create_test_users_token(self.customer)
+        create_test_users_profile(self.customer, 'customer')
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.customer_token.key)
+        self.client.post(reverse('orders-list'), {'offer_detail_id': details[0].id}, format='json')
+        review = {'business_user': self.business.id, 'rating': 4, 'description': 'Async!'}
+        self.client.post(reverse('reviews-list'), review, format='json')
+
+
+    def tearDown(self):
+        """Clean up created image files."""
+        delete_test_images()
+
+
+    def get(self, url, **extra):
+        cache.clear()
+        return self.client.get(url, **extra)
+
+
+    def test_read_endpoints_match_sync_views(self):
+        """Every async read endpoint returns the same status and data as the sync view."""
+        urls = [
+            reverse('offers-list') + '?page_size=1&page=2',
+            reverse('offers-list') + '?pagination=cursor&page_size=1',
+            reverse('offers-list') + '?ordering=min_price&search=Test',
+            reverse('offers-detail', kwargs={'pk': self.offer.pk}),
+            reverse('offers-detail', kwargs={'pk': 999}),
+            reverse('orders-detail-in_progress', kwargs={'pk': self.business.pk}),
+            reverse('orders-detail-completed', kwargs={'pk': self.business.pk}),
+            reverse('orders-detail-in_progress', kwargs={'pk': 999}),
+            reverse('reviews-list') + f'?business_user_id={self.business.pk}&include_stats=true',
+            reverse('reviews-list') + '?ordering=nonsense',
+            reverse('base_info')
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertTrue(iscoroutinefunction(resolve(url.split('?')[0]).func))
+                response = self.get(url)
+                with override_settings(ROOT_URLCONF='core.urls'):
+                    sync_response = self.get(url)
+
+                self.assertEqual(response.status_code, sync_response.status_code)
+                self.assertEqual(response.data, sync_response.data)
+
+        url = reverse('offers-detail', kwargs={'pk': self.offer.pk})
+        etag = self.get(url)['ETag']
+        response = self.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.business_token.key)
+        response = self.client.patch(url, {'title': 'Async title'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.get(url).data['title'], 'Async title')
+
+
+    async def test_asgi_request_path(self):
+        """The async test client runs the middleware and the views on the event loop."""
+        headers = {'authorization': 'Token ' + self.customer_token.key}
+        response = await self.async_client.get(reverse('offers-detail', kwargs={'pk': self.offer.pk}), headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['id'], self.offer.pk)
+
+        response = await self.async_client.get(reverse('offers-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['count'], 2)
@@ -5,11 +5,14 @@ Verifies aggregated statistics such as review count, average rating,
 business profile count, and offer count.
 """
 
+import time
+
+from django.core.cache import cache
 from django.urls import reverse
 from django.utils import timezone
 
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.test import APITestCase, APITransactionTestCase
 
 from auth_app.tests.utils import (
     create_test_user,
@@ -17,6 +20,7 @@ from auth_app.tests.utils import (
     create_test_users_profile,
     delete_test_images
 )
+from coderr_app.api.views import BaseInfoApiView
 from coderr_app.models import Review
 from .utils import create_offer
 
@@ -25,6 +29,7 @@ class base_info_tests(APITestCase):
     
     def setUp(self):
         """Prepare users, tokens, profiles, offers, and reviews."""
+        cache.clear()
 
         #Business users
         self.user_business = create_test_user()
@@ -86,4 +91,58 @@ class base_info_tests(APITestCase):
         self.assertEqual(response.data['business_profile_count'], 2)
         self.assertIsInstance(response.data['business_profile_count'], int)
         self.assertEqual(response.data['offer_count'], 1)
-        self.assertIsInstance(response.data['offer_count'], int)
\ No newline at end of file
+        self.assertIsInstance(response.data['offer_count'], int)
+
+    def test_base_info_snapshot(self):
+        """Ensure the snapshot is computed in one query, cached, and served stale while refreshing."""
+        with self.assertNumQueries(1):
+            self.client.get(reverse('base_info'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('base_info'))
+        self.assertEqual(response.data['offer_count'], 1)
+
+        create_offer(self.user_business)
+        snapshot = cache.get(BaseInfoApiView.cache_key)
+        snapshot['expires_at'] = time.time() - 1
+        cache.set(BaseInfoApiView.cache_key, snapshot)
+        cache.set(BaseInfoApiView.cache_key + ':lock', 1)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('base_info'))
+        self.assertEqual(response.data['offer_count'], 1)
+
+
+class BaseInfoRefreshTests(APITransactionTestCase):
+    """The background refresh of an expired snapshot, with committed data visible to its thread."""
+
+    def setUp(self):
+        cache.clear()
+        self.user_business = create_test_user()
+        create_test_users_profile(self.user_business)
+        create_offer(self.user_business)
+
+
+    def tearDown(self):
+        """Delete all test images after running a test."""
+        delete_test_images()
+
+
+    def test_expired_snapshot_is_recomputed_in_background(self):
+        """An expired snapshot is served once more, then replaced by the recomputed one."""
+        self.assertEqual(self.client.get(reverse('base_info')).data['offer_count'], 1)
+        create_offer(self.user_business)
+        snapshot = cache.get(BaseInfoApiView.cache_key)
+        snapshot['expires_at'] = time.time() - 1
+        cache.set(BaseInfoApiView.cache_key, snapshot)
+
+        self.assertEqual(self.client.get(reverse('base_info')).data['offer_count'], 1)
+
+        deadline = time.time() + 5
+        while cache.get(BaseInfoApiView.cache_key + ':lock') is not None and time.time() < deadline:
+            time.sleep(0.02)
+        refreshed = cache.get(BaseInfoApiView.cache_key)
+        self.assertEqual(refreshed['data']['offer_count'], 2)
+        self.assertGreater(refreshed['expires_at'], time.time())
+        self.assertIsNone(cache.get(BaseInfoApiView.cache_key + ':lock'))
+        self.assertEqual(self.client.get(reverse('base_info')).data['offer_count'], 2)
+
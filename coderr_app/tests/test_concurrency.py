@@ -0,0 +1,232 @@
+"""
+Concurrency tests for order and review writes.
+
+Parallel writers create orders and reviews through the API while readers
+list them and counters are recomputed, each thread on its own database
+connection. No request may fail and the counters must match the tables,
+also for the first orders of a business, which create its counter row.
+
+On SQLite the tests use the production options (WAL and immediate
+transactions), so that no writer fails with "database is locked". The
+in-memory test database cannot be shared like that, so they run against
+a temporary database file. On PostgreSQL they run on the test database.
+"""
+
+import tempfile
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient, APITransactionTestCase
+
+from auth_app.tests.utils import (
+    create_test_user,
+    create_test_users_token,
+    create_test_users_profile,
+    delete_test_images
+    )
+from coderr_app.models import Order, OrderCounter, Review, ReviewStats
+from .utils import create_offer, create_detail_set
+
+ORDERS_PER_CUSTOMER = 20
+READS_PER_READER = 10
+RECONCILES_PER_BUSINESS = 10
+
+
+class ConcurrentWritesMixin:
+    """Parallel order and review writes with concurrent readers."""
+
+    def setUp(self):
+        """Create business users with an offer each and customers with tokens."""
+        self.businesses = []
+        for index in range(2):
+            user = create_test_user(username=f'business_{index}')
+            create_test_users_profile(user)
+            offer = create_offer(user)
+            self.businesses.append((user, create_detail_set(offer.id)[0]))
+
+        self.customer_tokens = []
+        for index in range(4):
+            user = create_test_user(username=f'customer_{index}')
+            create_test_users_profile(user, 'customer')
+            self.customer_tokens.append(create_test_users_token(user).key)
+
+
+    def tearDown(self):
+        """Clean up created image files."""
+        delete_test_images()
+
+
+    def request(self, token, method, url, data=None):
+        """Send one API request from a worker thread and release its connection."""
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Token ' + token)
+        try:
+            return getattr(client, method)(url, data, format='json').status_code
+        finally:
+            connections.close_all()
+
+
+    def reconcile(self, business_id):
+        """Recompute a counter from a worker thread, a read-then-write transaction."""
+        try:
+            OrderCounter.recompute(business_id)
+            return True
+        finally:
+            connections.close_all()
+
+
+    def run_parallel_writers_and_readers(self):
+        """Run concurrent order/review creation, reads and recomputes; all succeed and counters stay consistent."""
+        jobs = []
+        for token in self.customer_tokens:
+            for business, detail in self.businesses:
+                jobs.append((token, 'post', reverse('orders-list'), {'offer_detail_id': detail.id}, status.HTTP_201_CREATED))
+                review = {'business_user': business.id, 'rating': 4, 'description': 'Parallel!'}
+                jobs.append((token, 'post', reverse('reviews-list'), review, status.HTTP_201_CREATED))
+            for _ in range(ORDERS_PER_CUSTOMER - len(self.businesses)):
+                jobs.append((token, 'post', reverse('orders-list'), {'offer_detail_id': self.businesses[0][1].id}, status.HTTP_201_CREATED))
+            for _ in range(READS_PER_READER):
+                jobs.append((token, 'get', reverse('orders-list'), None, status.HTTP_200_OK))
+                jobs.append((token, 'get', reverse('reviews-list'), None, status.HTTP_200_OK))
+
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            futures = [executor.submit(self.request, token, method, url, data) for token, method, url, data, _ in jobs]
+            reconciled = [executor.submit(self.reconcile, business.id) for business, _ in self.businesses * RECONCILES_PER_BUSINESS]
+            results = [future.result() for future in futures]
+            self.assertTrue(all(future.result() for future in reconciled))
+
+        self.assertEqual(results, [expected for *_, expected in jobs])
+        self.assertEqual(Order.objects.count(), len(self.customer_tokens) * ORDERS_PER_CUSTOMER)
+        self.assertEqual(Review.objects.count(), len(self.customer_tokens) * len(self.businesses))
+        for business, _ in self.businesses:
+            self.assertEqual(
+                OrderCounter.objects.get(pk=business.id).in_progress_count,
+                Order.objects.filter(business_user=business).count()
+            )
+            self.assertEqual(ReviewStats.objects.get(pk=business.id).review_count, len(self.customer_tokens))
+
+
+@skipUnless(connection.vendor == 'sqlite', 'SQLite specific')
+class SQLiteConcurrencyTests(ConcurrentWritesMixin, APITransactionTestCase):
+    """Concurrent writes on a SQLite file with the production options."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Switch the default database to a migrated file with the production options."""
+        cls.temp_dir = tempfile.TemporaryDirectory()
+        cls.memory_settings = connections.settings[DEFAULT_DB_ALIAS]
+        cls.memory_connection = connections[DEFAULT_DB_ALIAS]
+        connections.settings[DEFAULT_DB_ALIAS] = {
+            **cls.memory_settings,
+            'NAME': Path(cls.temp_dir.name) / 'concurrency.sqlite3',
+            'OPTIONS': settings.SQLITE_PRODUCTION_OPTIONS
+        }
+        connections[DEFAULT_DB_ALIAS] = connections.create_connection(DEFAULT_DB_ALIAS)
+        call_command('migrate', verbosity=0, interactive=False)
+        super().setUpClass()
+
+
+    @classmethod
+    def tearDownClass(cls):
+        """Restore the in-memory test database and remove the file."""
+        super().tearDownClass()
+        connections[DEFAULT_DB_ALIAS].close()
+        connections[DEFAULT_DB_ALIAS] = cls.memory_connection
+        connections.settings[DEFAULT_DB_ALIAS] = cls.memory_settings
+        cls.temp_dir.cleanup()
+
+
+    def test_parallel_writers_and_readers(self):
+        """Concurrent order/review creation and reads all succeed and keep counters consistent."""
+        self.assertEqual(connection.cursor().execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+        self.run_parallel_writers_and_readers()
+
+
+@skipUnless(connection.vendor == 'postgresql', 'PostgreSQL specific')
+class PostgreSQLConcurrencyTests(ConcurrentWritesMixin, APITransactionTestCase):
+    """Concurrent writes on PostgreSQL, where first orders race to create the counter row."""
+
+    def test_parallel_writers_and_readers(self):
+        """Concurrent order/review creation and reads all succeed and keep counters consistent."""
+        self.run_parallel_writers_and_readers()
+
+
+    def run_overlapping(self, first, second):
+        """
+        Run second in a worker thread while the transaction of first is still open.
+
+        first runs in its own transaction in another thread and commits a
+        moment after it is done, so second works against its uncommitted
+        writes.
+        """
+        first_done = threading.Event()
+
+        def run_first():
+            try:
+                with transaction.atomic():
+                    first()
+                    first_done.set()
+                    time.sleep(0.3)
+            finally:
+                first_done.set()
+                connections.close_all()
+
+        def run_second():
+            first_done.wait()
+            try:
+                with transaction.atomic():
+                    second()
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            for future in [executor.submit(run_first), executor.submit(run_second)]:
+                future.result()
+
+
+    def test_overlapping_first_orders(self):
+        """Two first orders of a business in overlapping transactions are both counted."""
+        business, detail = self.businesses[0]
+        customer = User.objects.get(username='customer_0')
+
+        def create_order():
+            Order.objects.create(offer_detail=detail, customer_user=customer, business_user=business, created_at=timezone.now())
+
+        self.assertFalse(OrderCounter.objects.filter(pk=business.pk).exists())
+        self.run_overlapping(create_order, create_order)
+
+        self.assertEqual(OrderCounter.objects.get(pk=business.pk).in_progress_count, 2)
+
+
+    def test_overlapping_first_reviews(self):
+        """Two first reviews of a business in overlapping transactions are both counted."""
+        business, _ = self.businesses[0]
+        reviewers = iter(User.objects.filter(username__in=['customer_0', 'customer_1']))
+
+        def create_review():
+            Review.objects.create(
+                business_user=business,
+                reviewer=next(reviewers),
+                rating=4,
+                description='Overlapping!',
+                created_at=timezone.now(),
+                updated_at=timezone.now()
+            )
+
+        self.assertFalse(ReviewStats.objects.filter(pk=business.pk).exists())
+        self.run_overlapping(create_review, create_review)
+
+        stats = ReviewStats.objects.get(pk=business.pk)
+        self.assertEqual((stats.review_count, stats.rating_sum, stats.rating_4_count), (2, 8, 2))
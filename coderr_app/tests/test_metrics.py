@@ -0,0 +1,105 @@
+"""
+Tests for the per-request metrics middleware.
+"""
+
+import re
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from auth_app.tests.utils import (
+    create_test_user,
+    create_test_users_token,
+    create_test_users_profile,
+    delete_test_images
+    )
+from core.metrics import route_histograms
+from .utils import create_offer, create_detail_set
+
+SERVER_TIMING = re.compile(
+    r'db;dur=(?P<db>[\d.]+);desc="(?P<queries>\d+) queries", serializer;dur=(?P<serializer>[\d.]+), total;dur=(?P<total>[\d.]+)'
+)
+
+
+class RequestMetricsTests(APITestCase):
+    """Server-Timing header, route histograms and budget logging."""
+
+    def setUp(self):
+        """Create a business user with two offers."""
+        self.user = create_test_user()
+        self.token = create_test_users_token(self.user)
+        create_test_users_profile(self.user)
+        for _ in range(2):
+            create_detail_set(create_offer(self.user).id)
+        route_histograms.clear()
+
+
+    def tearDown(self):
+        """Clean up created image files."""
+        delete_test_images()
+
+
+    def test_server_timing_histograms_and_budgets(self):
+        """Queries are counted without DEBUG, also on the async path, and query and latency overruns are logged."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('offers-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        timing = SERVER_TIMING.fullmatch(response['Server-Timing'])
+        self.assertIsNotNone(timing)
+        self.assertEqual(int(timing['queries']), len(queries))
+        self.assertGreater(float(timing['serializer']), 0)
+        self.assertGreaterEqual(float(timing['total']), float(timing['db']))
+
+        self.client.get(reverse('base_info'))
+        self.client.get(reverse('offers-list') + '?page=2')
+        snapshot = route_histograms.snapshot()
+        self.assertEqual(snapshot['GET offers-list']['count'], 2)
+        self.assertEqual(snapshot['GET base_info']['count'], 1)
+        self.assertEqual(sum(snapshot['GET offers-list']['queries'].values()), 2)
+
+        with override_settings(REQUEST_BUDGETS={'GET offers-list': {'queries': 0}}):
+            with self.assertLogs('core.metrics', 'WARNING') as logs:
+                self.client.get(reverse('offers-list') + '?page_size=1')
+        self.assertIn('GET offers-list /api/offers/?page_size=1 over budget', logs.output[0])
+
+        with override_settings(REQUEST_BUDGETS={'GET offers-list': {'latency_ms': 0}}):
+            with self.assertLogs('core.metrics', 'WARNING') as logs:
+                self.client.get(reverse('offers-list'))
+        self.assertIn('(budget 0 ms)', logs.output[0])
+
+
+    @override_settings(ROOT_URLCONF='core.asgi_urls')
+    async def test_async_request_queries_counted(self):
+        """Queries of async views, run in sync_to_async threads, count for their request."""
+        headers = {'authorization': 'Token ' + self.token.key}
+        response = await self.async_client.get(reverse('offers-list') + '?page_size=1', headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        timing = SERVER_TIMING.fullmatch(response['Server-Timing'])
+        self.assertIsNotNone(timing)
+        self.assertGreater(int(timing['queries']), 1)
+
+
+    def test_histograms_exposed(self):
+        """Staff read the histograms at /api/metrics/, and every window ends with a summary line per route."""
+        self.client.get(reverse('offers-list'))
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        response = self.client.get(reverse('request_metrics'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get(reverse('request_metrics'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['window_seconds'], route_histograms.get_window())
+        self.assertEqual(response.data['routes']['GET offers-list']['count'], 1)
+
+        route_histograms.next_summary = 0
+        with self.assertLogs('core.metrics', 'INFO') as logs:
+            self.client.get(reverse('base_info'))
+        self.assertTrue(any('GET offers-list: 1 requests in the last 300 s' in line for line in logs.output))
+        self.assertFalse(route_histograms.summary_due())
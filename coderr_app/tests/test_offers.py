@@ -10,6 +10,16 @@ Includes:
 
 import copy
 
+from io import BytesIO, StringIO
+
+from PIL import Image
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 
@@ -28,6 +38,8 @@ from .utils import (
     create_offer,
     create_detail_set
 )
+from coderr_app.cache import get_offer_list_cache_stats
+from coderr_app.images import process_image
 from coderr_app.models import Offer, Detail
 
 class OffersTests(APITestCase):
@@ -450,4 +462,312 @@ class OffersTests(APITestCase):
 
         response = self.client.get(reverse('detail-detail', kwargs={'pk': 9999}))
 
-        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_min_values_follow_detail_writes(self):
+        """
+        Ensure the stored min_price and min_delivery_time of an Offer
+        are recalculated whenever one of its details is written or removed.
+        """
+        self.offer.refresh_from_db()
+        self.assertEqual(self.offer.min_price, self.min_price)
+        self.assertEqual(self.offer.min_delivery_time, self.min_delivery_time)
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        response = self.client.patch(self.url_detail, self.patch_request_body, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.offer.refresh_from_db()
+        self.assertEqual(self.offer.min_price, self.updated_price)
+        self.assertEqual(self.offer.min_delivery_time, self.updated_delivery_time)
+
+        Detail.objects.filter(offer=self.offer, offer_type='basic').get().delete()
+        self.offer.refresh_from_db()
+        self.assertEqual(self.offer.min_price, 999)
+        self.assertEqual(self.offer.min_delivery_time, 15)
+
+
+    def test_min_values_follow_bulk_detail_writes(self):
+        """
+        Ensure queryset updates, bulk creates and queryset deletes of details,
+        which send no signals, also keep the min values in sync.
+        """
+        Detail.objects.filter(offer=self.offer).update(price=F('price') + 1000, delivery_time_in_days=40)
+        self.offer.refresh_from_db()
+        self.assertEqual(self.offer.min_price, self.min_price + 1000)
+        self.assertEqual(self.offer.min_delivery_time, 40)
+
+        Detail.objects.bulk_create([Detail(
+            offer=self.offer, title='Bulk', revisions=1, delivery_time_in_days=2, price=5, features=[]
+        )])
+        self.offer.refresh_from_db()
+        self.assertEqual(self.offer.min_price, 5)
+        self.assertEqual(self.offer.min_delivery_time, 2)
+
+        Detail.objects.filter(offer=self.offer).delete()
+        self.offer.refresh_from_db()
+        self.assertIsNone(self.offer.min_price)
+        self.assertIsNone(self.offer.min_delivery_time)
+
+
+    def test_get_list_query_count_is_constant(self):
+        """
+        Ensure the Offers list runs the same number of queries
+        no matter how many offers are on the page.
+        """
+        with CaptureQueriesContext(connection) as single_page:
+            response = self.client.get(self.url_list)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        for _ in range(5):
+            offer = create_offer(self.second_user)
+            create_detail_set(offer.pk)
+
+        with CaptureQueriesContext(connection) as full_page:
+            response = self.client.get(self.url_list)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 6)
+        self.assertEqual(len(full_page), len(single_page))
+
+
+    def test_search_uses_full_text_index(self):
+        """
+        Ensure search matches word prefixes in title and description,
+        follows offer updates, and can be ordered by relevance.
+        """
+        other_offer = create_offer(self.second_user)
+        create_detail_set(other_offer.pk)
+        Offer.objects.filter(pk=other_offer.pk).update(description='Grafikdesign Grafikdesign Logo')
+
+        response = self.client.get(self.url_list, {'search': 'grafik'})
+        ids = {offer['id'] for offer in response.data['results']}
+        self.assertEqual(ids, {self.offer.pk, other_offer.pk})
+
+        if connection.vendor == 'sqlite':
+            response = self.client.get(self.url_list, {'search': 'rafik'})
+            self.assertEqual(response.data['results'], [])
+
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+            plan = Offer.objects.filter(title__icontains='grafik').explain()
+            self.assertIn('offer_title_trgm_idx', plan)
+            plan = Offer.objects.filter(description__icontains='grafik').explain()
+            self.assertIn('offer_description_trgm_idx', plan)
+            with connection.cursor() as cursor:
+                cursor.execute('RESET enable_seqscan')
+
+        response = self.client.get(self.url_list, {'search': 'Grafikdesign', 'ordering': 'relevance'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['id'], other_offer.pk)
+
+        response = self.client.get(self.url_list, {'ordering': 'relevance'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        Offer.objects.filter(pk=other_offer.pk).update(description='Webentwicklung')
+        response = self.client.get(self.url_list, {'search': 'Logo'})
+        self.assertEqual(response.data['results'], [])
+
+        call_command('rebuild_offer_search_index', stdout=StringIO())
+        response = self.client.get(self.url_list, {'search': 'webentwicklung'})
+        self.assertEqual([offer['id'] for offer in response.data['results']], [other_offer.pk])
+
+
+    def test_get_list_cursor_pagination(self):
+        """
+        Ensure cursor pagination walks every offer exactly once
+        in (min_price, id) order without a total count.
+        """
+        for price in [999, 50, 50, 10]:
+            offer = create_offer(self.second_user)
+            create_detail_set(offer.pk)
+            Detail.objects.filter(offer=offer, offer_type='basic').update(price=price)
+        Offer.objects.update_min_values()
+
+        params = {'pagination': 'cursor', 'ordering': 'min_price', 'page_size': 2}
+        response = self.client.get(self.url_list, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data.keys()), {'next', 'results'})
+
+        offers = response.data['results']
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            offers += response.data['results']
+
+        expected = list(Offer.objects.order_by('min_price', 'id').values_list('id', flat=True))
+        self.assertEqual([offer['id'] for offer in offers], expected)
+
+        response = self.client.get(self.url_list, {'pagination': 'cursor', 'cursor': 'invalid'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+    def test_get_list_response_cache(self):
+        """
+        Ensure repeated list requests are served from the cache
+        and offer, detail, or owner name changes invalidate it.
+        """
+        params = {'ordering': 'min_price', 'page_size': 5}
+        stats = get_offer_list_cache_stats()
+        self.client.get(self.url_list, params)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url_list, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        new_stats = get_offer_list_cache_stats()
+        self.assertEqual(new_stats['hits'], stats['hits'] + 1)
+        self.assertEqual(new_stats['misses'], stats['misses'] + 1)
+
+        self.detail.price = 1
+        self.detail.save()
+        response = self.client.get(self.url_list, params)
+        self.assertEqual(response.data['results'][0]['min_price'], 1)
+
+        self.user.first_name = 'Erika'
+        self.user.save()
+        response = self.client.get(self.url_list, params)
+        self.assertEqual(response.data['results'][0]['user_details']['first_name'], 'Erika')
+
+        self.offer.title = 'Renamed'
+        self.offer.save()
+        response = self.client.get(self.url_list, params)
+        self.assertEqual(response.data['results'][0]['title'], 'Renamed')
+
+
+    def test_get_detail_conditional(self):
+        """
+        Ensure Offer and Detail retrieval send validators and answer
+        matching conditional requests with 304 until the data changes.
+        """
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        response = self.client.get(self.url_detail)
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+
+        response = self.client.get(self.url_detail, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+        self.detail.price = 1
+        self.detail.save()
+        response = self.client.get(self.url_detail, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+        url = reverse('detail-detail', kwargs={'pk': self.detail.pk})
+        response = self.client.get(url)
+        self.assertFalse(response.has_header('Last-Modified'))
+        detail_etag = response['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=detail_etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.detail.price = 2
+        self.detail.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=detail_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        etag = self.client.get(self.url_detail)['ETag']
+        response = self.client.get(self.url_detail, {'min_price': 1000}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+    def test_post_and_patch_keep_offer_consistent(self):
+        """
+        Ensure bulk detail writes store the min values and a rejected
+        detail update leaves the whole Offer unchanged.
+        """
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        response = self.client.post(self.url_list, self.post_request_body, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        offer = Offer.objects.get(pk=response.data['id'])
+        self.assertEqual(offer.details.count(), 3)
+        self.assertEqual(offer.min_price, self.min_price)
+        self.assertEqual(offer.min_delivery_time, self.min_delivery_time)
+
+        incomplete_data = copy.deepcopy(self.patch_request_body)
+        del incomplete_data['details'][0]['price']
+        response = self.client.patch(self.url_detail, incomplete_data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.offer.refresh_from_db()
+        self.assertEqual(self.offer.title, self.post_request_body['title'])
+        self.assertEqual(self.offer.min_price, self.min_price)
+
+
+    @override_settings(IMAGE_MAX_DIMENSION=400, IMAGE_VARIANT_WIDTHS=[100, 200])
+    def test_image_processing_keeps_files_of_other_offers(self):
+        """Ensure images sharing a stem never replace or delete each other's files."""
+        def upload(name, mode, image_format):
+            buffer = BytesIO()
+            Image.new(mode, (300, 300), color='red').save(buffer, format=image_format)
+            offer = create_offer(self.user)
+            offer.image = SimpleUploadedFile(name, buffer.getvalue())
+            offer.save()
+            return offer
+
+        jpeg_offer = upload('test_image_stem.jpg', 'RGB', 'JPEG')
+        png_offer = upload('test_image_stem.png', 'RGB', 'PNG')
+        jpeg_variants = process_image(Offer, jpeg_offer.pk, 'image', 'image_variants')
+        png_variants = process_image(Offer, png_offer.pk, 'image', 'image_variants')
+
+        storage = jpeg_offer.image.storage
+        self.assertTrue(set(jpeg_variants.values()).isdisjoint(png_variants.values()))
+        for name in [*jpeg_variants.values(), *png_variants.values()]:
+            self.assertTrue(storage.exists(name))
+
+        png_offer.refresh_from_db()
+        png_name = png_offer.image.name
+        alpha_offer = upload(png_name.replace('.png', '.jpg').split('/')[-1], 'RGBA', 'PNG')
+        process_image(Offer, alpha_offer.pk, 'image', 'image_variants')
+
+        alpha_offer.refresh_from_db()
+        self.assertTrue(alpha_offer.image.name.endswith('.png'))
+        self.assertNotEqual(alpha_offer.image.name, png_name)
+        with storage.open(png_name) as stored:
+            self.assertEqual(Image.open(stored).mode, 'RGB')
+        for name in png_variants.values():
+            self.assertTrue(storage.exists(name))
+
+
+    @override_settings(IMAGE_MAX_DIMENSION=400, IMAGE_VARIANT_WIDTHS=[100, 200], IMAGE_LIST_VARIANT_WIDTH=150)
+    def test_image_processing(self):
+        """
+        Ensure uploaded images are normalized without EXIF data,
+        resized into variants, and the list returns the fitting variant.
+        """
+        buffer = BytesIO()
+        exif = Image.Exif()
+        exif[0x010f] = 'Camera'
+        Image.new('RGB', (1000, 500), color='blue').save(buffer, format='JPEG', exif=exif)
+        self.offer.image = SimpleUploadedFile('test_image_large.jpg', buffer.getvalue(), content_type='image/jpeg')
+        self.offer.save()
+
+        variants = process_image(Offer, self.offer.pk, 'image', 'image_variants')
+
+        self.offer.refresh_from_db()
+        self.assertEqual(self.offer.image_variants, variants)
+        self.assertEqual(set(variants), {'100', '200'})
+        with self.offer.image.open() as stored:
+            image = Image.open(stored)
+            self.assertEqual(image.size, (400, 200))
+            self.assertEqual(len(image.getexif()), 0)
+        with self.offer.image.storage.open(variants['200']) as stored:
+            self.assertEqual(Image.open(stored).size, (200, 100))
+
+        response = self.client.get(self.url_list)
+        api_offer = next(offer for offer in response.data['results'] if offer['id'] == self.offer.pk)
+        self.assertTrue(api_offer['image'].endswith(variants['200']))
+
+        buffer = BytesIO()
+        Image.new('RGBA', (300, 300), color=(0, 0, 255, 128)).save(buffer, format='PNG')
+        self.offer.image = SimpleUploadedFile('test_image_alpha.jpg', buffer.getvalue(), content_type='image/jpeg')
+        self.offer.save()
+        uploaded_name = self.offer.image.name
+
+        process_image(Offer, self.offer.pk, 'image', 'image_variants')
+
+        self.offer.refresh_from_db()
+        self.assertTrue(self.offer.image.name.endswith('.png'))
+        self.assertFalse(self.offer.image.storage.exists(uploaded_name))
+        with self.offer.image.open() as stored:
+            self.assertEqual(Image.open(stored).format, 'PNG')
@@ -4,6 +4,11 @@ Automated API tests for the Order endpoints.
 Covers creation, retrieval, update, deletion, and custom order detail views.
 """
 
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from django.contrib.auth.models import User
@@ -17,7 +22,8 @@ from auth_app.tests.utils import (
     create_test_users_profile,
     delete_test_images
     )
-from coderr_app.models import Order
+from coderr_app.api.paginations import OrderCursorPagination
+from coderr_app.models import Order, OrderCounter
 from .utils import create_offer, create_detail_set
 
 class OrdersTests(APITestCase):
@@ -123,8 +129,76 @@ class OrdersTests(APITestCase):
         response = self.client.get(self.url_list)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(set(response.data[0].keys()), self.expected_fields)
-        self.assertIsInstance(response.data[0]['features'], list)
+        self.assertEqual(set(response.data.keys()), {'next', 'results'})
+        self.assertEqual(set(response.data['results'][0].keys()), self.expected_fields)
+        self.assertIsInstance(response.data['results'][0]['features'], list)
+
+
+    def test_get_list_query_count_is_constant(self):
+        """Listing orders runs the same number of queries for any number of orders."""
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token_business.key)
+        self.client.get(self.url_list)
+        with CaptureQueriesContext(connection) as single_order:
+            self.client.get(self.url_list)
+
+        for detail in [self.detail_standard, self.detail_premium] * 3:
+            Order.objects.create(
+                offer_detail=detail,
+                customer_user=self.user_customer,
+                business_user=self.user_business,
+                created_at=timezone.now()
+            )
+
+        with CaptureQueriesContext(connection) as many_orders:
+            response = self.client.get(self.url_list)
+
+        self.assertEqual(len(response.data['results']), 7)
+        self.assertEqual(len(many_orders), len(single_order))
+        self.assertEqual({order['business_user'] for order in response.data['results']}, {self.user_business.id})
+
+
+    def test_get_list_filters_and_pagination(self):
+        """Orders can be filtered by status and date and paged with cursors, newest first."""
+        now = timezone.now()
+        for days in range(1, 5):
+            Order.objects.create(
+                offer_detail=self.detail_standard,
+                customer_user=self.user_customer,
+                business_user=self.user_business,
+                status='completed',
+                created_at=now - timezone.timedelta(days=days)
+            )
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token_customer.key)
+
+        response = self.client.get(self.url_list, {'status': 'completed', 'page_size': 3})
+        orders = response.data['results']
+        response = self.client.get(response.data['next'])
+        orders += response.data['results']
+
+        self.assertIsNone(response.data['next'])
+        self.assertEqual(len(orders), 4)
+        self.assertTrue(all(order['status'] == 'completed' for order in orders))
+        self.assertEqual([order['created_at'] for order in orders], sorted([order['created_at'] for order in orders], reverse=True))
+
+        created_after = (now - timezone.timedelta(days=2, hours=1)).isoformat()
+        response = self.client.get(self.url_list, {'created_after': created_after, 'created_before': now.isoformat()})
+        self.assertEqual(len(response.data['results']), 3)
+
+        for params in [{'status': 'done'}, {'created_after': 'yesterday'}]:
+            response = self.client.get(self.url_list, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+            paginator = OrderCursorPagination()
+            paginator.field, paginator.descending = 'created_at', True
+            for status_value in ('in_progress', 'completed'):
+                plan = (
+                    Order.objects.filter(business_user=self.user_business, status=status_value)
+                    .order_by(*paginator.get_order_by()).explain()
+                )
+                self.assertIn(f'order_{status_value}_business_idx', plan)
 
 
     def test_get_list_fails(self):
@@ -143,6 +217,17 @@ class OrdersTests(APITestCase):
         self.assertEqual(response.data['status'], 'completed')
 
 
+    def test_patch_loads_profile_once(self):
+        """The profile type is resolved once per request and shared by permissions and the queryset."""
+        self.client.force_authenticate(user=User.objects.get(pk=self.user_business.pk))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(self.url_detail, self.patch_request_body, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        profile_queries = [query for query in queries if 'FROM "auth_app_profile"' in query['sql']]
+        self.assertEqual(len(profile_queries), 1)
+
+
     def test_patch_fails(self):
         """Patch requests fail for invalid status, unauthorized, or non-existing orders."""
         wrong_data = {
@@ -218,4 +303,33 @@ class OrdersTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
         self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token_business.key)
         response = self.client.get(reverse('orders-detail-completed', kwargs={'pk': 99999}))
-        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+    def test_order_counters(self):
+        """Counters follow order creation, status changes, and deletion, and can be reconciled."""
+        url_in_progress = reverse('orders-detail-in_progress', kwargs={'pk': self.user_business.id})
+        url_completed = reverse('orders-detail-completed', kwargs={'pk': self.user_business.id})
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token_business.key)
+        self.client.patch(self.url_detail, self.patch_request_body, format='json')
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url_completed)
+        self.assertEqual(response.data['completed_order_count'], 1)
+        self.assertEqual(self.client.get(url_in_progress).data['order_count'], 0)
+
+        Order.objects.filter(pk=self.order.pk).delete()
+        self.assertEqual(self.client.get(url_completed).data['completed_order_count'], 0)
+
+        response = self.client.get(reverse('orders-detail-in_progress', kwargs={'pk': self.user_customer.id}))
+        self.assertEqual(response.data['order_count'], 0)
+
+        Order.objects.create(
+            offer_detail=self.detail_basic,
+            customer_user=self.user_customer,
+            business_user=self.user_business,
+            created_at=timezone.now()
+        )
+        OrderCounter.objects.filter(pk=self.user_business.id).update(in_progress_count=42)
+        call_command('reconcile_order_counters', stdout=StringIO())
+        self.assertEqual(self.client.get(url_in_progress).data['order_count'], 1)
@@ -0,0 +1,139 @@
+"""
+Tests for read-replica routing.
+
+A second SQLite file acts as the replica and is refreshed by copying the
+primary (sync_sqlite_replicas), so replication lag can be simulated by
+writing to the primary without syncing.
+"""
+
+import os
+import tempfile
+
+from django.db import connections
+from django.test import override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient, APITransactionTestCase
+
+from auth_app.tests.utils import (
+    create_test_user,
+    create_test_users_token,
+    create_test_users_profile,
+    delete_test_images
+    )
+from coderr_app.api.views import fetch_base_info
+from coderr_app.models import Offer
+from core.routers import PrimaryReplicaRouter, replica_reads, sync_sqlite_replicas
+from .utils import create_offer, create_detail_set
+
+REPLICA = 'replica_test'
+
+
+class ReplicaRoutingTests(APITransactionTestCase):
+    """Safe requests read from the replica unless the client wrote recently."""
+
+    def setUp(self):
+        """Register a SQLite replica and create two users and an offer on the primary."""
+        if connections['default'].vendor != 'sqlite':
+            self.skipTest('Uses SQLite files as replica')
+        handle, path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        connections.settings[REPLICA] = {**connections.settings['default'], 'NAME': path}
+        type(self).databases = {'default', REPLICA}
+        self.addCleanup(self.remove_replica, path)
+        settings_override = override_settings(DATABASE_REPLICAS=[REPLICA], SQLITE_REPLICA_AUTOSYNC=False)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = create_test_user()
+        self.token = create_test_users_token(self.user)
+        create_test_users_profile(self.user)
+        self.reader = create_test_user(username='reader')
+        self.reader_token = create_test_users_token(self.reader)
+        create_test_users_profile(self.reader, 'customer')
+        self.offer = create_offer(self.user)
+        create_detail_set(self.offer.id)
+
+
+    def tearDown(self):
+        """Clean up created image files."""
+        delete_test_images()
+
+
+    def remove_replica(self, path):
+        """Unregister the replica before the primary is flushed and delete its files."""
+        type(self).databases = {'default'}
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.settings[REPLICA]
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+    def get_offer(self, token, offer):
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+        return self.client.get(reverse('offers-detail', kwargs={'pk': offer.pk}))
+
+
+    def test_reads_follow_replica_until_client_writes(self):
+        """Reads see the replica's state, except for a client that just wrote."""
+        router = PrimaryReplicaRouter()
+        self.assertEqual(router.db_for_read(Offer), 'default')
+        with replica_reads():
+            self.assertEqual(router.db_for_read(Offer), REPLICA)
+            self.assertEqual(router.db_for_write(Offer), 'default')
+
+        sync_sqlite_replicas()
+        new_offer = create_offer(self.user)
+        create_detail_set(new_offer.id)
+
+        self.assertEqual(self.get_offer(self.reader_token, self.offer).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.get_offer(self.reader_token, new_offer).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.get_offer(self.token, new_offer).status_code, status.HTTP_404_NOT_FOUND)
+
+        response = self.client.patch(reverse('offers-detail', kwargs={'pk': self.offer.pk}), {'title': 'Sticky'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(self.get_offer(self.token, new_offer).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.get_offer(self.reader_token, new_offer).status_code, status.HTTP_404_NOT_FOUND)
+
+        sync_sqlite_replicas()
+
+        response = self.get_offer(self.reader_token, self.offer)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['title'], 'Sticky')
+        self.assertEqual(self.get_offer(self.reader_token, new_offer).status_code, status.HTTP_200_OK)
+
+
+    def test_pins_follow_user_and_issued_token(self):
+        """A write pins all sessions of its user, and registration pins the token it issues."""
+        sync_sqlite_replicas()
+        new_offer = create_offer(self.user)
+        create_detail_set(new_offer.id)
+        url = reverse('offers-detail', kwargs={'pk': new_offer.pk})
+        with replica_reads():
+            self.assertEqual(fetch_base_info()['offer_count'], 1)
+
+        session_client = APIClient()
+        session_client.force_login(self.user)
+        self.assertEqual(session_client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        response = self.client.patch(reverse('offers-detail', kwargs={'pk': self.offer.pk}), {'title': 'Sticky'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(session_client.get(url).status_code, status.HTTP_200_OK)
+
+        self.client.credentials()
+        registration = {
+            'username': 'newcomer',
+            'email': 'newcomer@mail.de',
+            'password': 'examplePassword',
+            'repeated_password': 'examplePassword',
+            'type': 'customer'
+        }
+        response = self.client.post(reverse('registration'), registration, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + response.data['token'])
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
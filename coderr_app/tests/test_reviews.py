@@ -4,6 +4,10 @@ Automated API tests for the Review endpoints.
 Covers CRUD operations, permissions, and filtering behavior for reviews.
 """
 
+from unittest.mock import patch
+
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 
@@ -16,7 +20,8 @@ from auth_app.tests.utils import (
     create_test_users_profile,
     delete_test_images
     )
-from coderr_app.models import Review
+from coderr_app.api.paginations import ReviewCursorPagination
+from coderr_app.models import Review, ReviewStats
 
 class ReviewsTests(APITestCase):
     """Integration tests for the Review API."""
@@ -134,7 +139,7 @@ class ReviewsTests(APITestCase):
         response = self.client.get(self.url_list)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(set(response.data[0].keys()), self.expected_fields)
+        self.assertEqual(set(response.data['results'][0].keys()), self.expected_fields)
 
         # Filtering & ordering tests
         param_tests = [
@@ -146,11 +151,49 @@ class ReviewsTests(APITestCase):
 
         for params, check, lenght in param_tests:
             response = self.client.get(self.url_list, params)
-            reviews = response.data
+            reviews = response.data['results']
             self.assertEqual(len(reviews), lenght, f"Param test returned no offers for params: {params}")
             self.assertTrue(check(reviews))
 
     
+    def test_get_list_pagination(self):
+        """Reviews are paged with cursors in descending order, and filtered pages use the composite indexes."""
+        now = timezone.now()
+        for index, customer in enumerate([self.user_customer_2, self.user_business_2]):
+            Review.objects.create(
+                business_user=self.user_business,
+                reviewer=customer,
+                rating=index + 1,
+                description='Test!',
+                created_at=now - timezone.timedelta(days=index + 1)
+            )
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token_business.key)
+
+        response = self.client.get(self.url_list, {'business_user_id': self.user_business.pk, 'ordering': '-rating', 'page_size': 2})
+        reviews = response.data['results']
+        response = self.client.get(response.data['next'])
+        reviews += response.data['results']
+
+        self.assertIsNone(response.data['next'])
+        self.assertEqual([review['rating'] for review in reviews], [4, 2, 1])
+
+        response = self.client.get(self.url_list, {'ordering': 'updated_at'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        if connection.vendor == 'sqlite':
+            plans = [
+                ({'business_user_id': self.user_business.pk}, '-created_at', 'review_business_created_idx'),
+                ({'business_user_id': self.user_business.pk}, 'rating', 'review_business_rating_idx'),
+                ({'reviewer_id': self.user_customer.pk}, '-created_at', 'review_reviewer_created_idx')
+            ]
+            for filters, ordering, index_name in plans:
+                paginator = ReviewCursorPagination()
+                paginator.field, paginator.descending = ordering.lstrip('-'), ordering.startswith('-')
+                plan = Review.objects.filter(**filters).order_by(*paginator.get_order_by()).explain()
+                self.assertIn(index_name, plan)
+                self.assertNotIn('TEMP B-TREE', plan)
+
+
     def test_get_list_fails(self):
         """Unauthenticated users cannot retrieve the review list."""
         response = self.client.get(self.url_list)
@@ -201,4 +244,63 @@ class ReviewsTests(APITestCase):
             if token:
                 self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
             response = self.client.patch(url, data, format='json')
-            self.assertEqual(response.status_code, expected)
\ No newline at end of file
+            self.assertEqual(response.status_code, expected)
+
+
+    def test_review_stats(self):
+        """Stats follow review creation, updates, and deletion and are served without scanning reviews."""
+        url_stats = reverse('review-stats-detail', kwargs={'pk': self.user_business.pk})
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token_customer.key)
+        self.client.patch(self.url_detail, self.patch_request_body, format='json')
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token_customer_2.key)
+        self.client.post(self.url_list, {**self.post_request_body, 'business_user': self.user_business.pk}, format='json')
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url_stats)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['review_count'], 2)
+        self.assertEqual(response.data['average_rating'], 3.5)
+        self.assertEqual(response.data['rating_histogram'], {'1': 0, '2': 1, '3': 0, '4': 0, '5': 1})
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token_customer.key)
+        self.client.delete(self.url_detail)
+        response = self.client.get(self.url_list, {'business_user_id': self.user_business.pk, 'include_stats': 'true'})
+
+        self.assertEqual(response.data['stats']['review_count'], 1)
+        self.assertEqual(response.data['stats']['average_rating'], 2)
+        self.assertEqual(len(response.data['results']), 1)
+
+        response = self.client.get(reverse('review-stats-detail', kwargs={'pk': self.user_customer.pk}))
+        self.assertEqual(response.data['review_count'], 0)
+        response = self.client.get(reverse('review-stats-detail', kwargs={'pk': 99999}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+
+    def test_post_duplicate_single_write(self):
+        """A review is created without an existence check and duplicates are rejected by the database."""
+        ReviewStats.recompute(self.user_business_2.pk)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token_customer.key)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url_list, self.post_request_body, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        review_queries = [query['sql'] for query in queries if '"coderr_app_review"' in query['sql']]
+        self.assertEqual(len(review_queries), 1)
+        self.assertTrue(review_queries[0].startswith('INSERT'))
+
+        response = self.client.post(self.url_list, self.post_request_body, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, ['You have already reviewed this business user!'])
+        self.assertEqual(Review.objects.filter(reviewer=self.user_customer, business_user=self.user_business_2).count(), 1)
+
+
+    def test_post_other_integrity_error_not_reported_as_duplicate(self):
+        """Only the unique review constraint is turned into the duplicate review error."""
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token_customer.key)
+        error = IntegrityError('NOT NULL constraint failed: coderr_app_review.description')
+        with patch.object(Review.objects, 'create', side_effect=error):
+            with self.assertRaises(IntegrityError):
+                self.client.post(self.url_list, self.post_request_body, format='json')
@@ -0,0 +1,28 @@
+"""
+URL configuration for the ASGI entry point.
+
+Same routes as core.urls, but login and registration are served by async
+views that hash passwords in a bounded thread pool instead of blocking
+the event loop, and the offers list and detail, order counts, reviews
+list and base info are served by views that read through the async ORM.
+"""
+from django.urls import path, include
+
+from rest_framework import routers
+
+from auth_app.api.views import AsyncRegistrationView, AsyncLoginView
+from coderr_app.api.views import AsyncOfferViewSet, AsyncOrderCountView, AsyncReviewViewSet, AsyncBaseInfoApiView
+from core.urls import urlpatterns as sync_urlpatterns
+
+router = routers.SimpleRouter()
+router.register(r'offers', AsyncOfferViewSet, basename='offers')
+router.register(r'reviews', AsyncReviewViewSet, basename='reviews')
+
+urlpatterns = [
+    path('api/registration/', AsyncRegistrationView.as_view(), name="registration"),
+    path('api/login/', AsyncLoginView.as_view(), name="login"),
+    path('api/', include(router.urls)),
+    path('api/order-count/<int:pk>/', AsyncOrderCountView.as_view(), name='orders-detail-in_progress'),
+    path('api/completed-order-count/<int:pk>/', AsyncOrderCountView.as_view(), name='orders-detail-completed'),
+    path('api/base-info/', AsyncBaseInfoApiView.as_view(), name='base_info'),
+] + sync_urlpatterns
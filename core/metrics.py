@@ -0,0 +1,249 @@
+"""
+Per-request database and serializer metrics.
+
+Every database connection gets a query recorder when it is created (see
+core.signals). While RequestMetricsMiddleware measures a request,
+the recorder adds each query and its time to the request's
+RequestMetrics. That object lives in a context variable, so it follows
+the request into the sync_to_async threads of the async views; queries
+outside a measured request pass straight through. Nothing depends on
+DEBUG or connection.queries.
+
+Finished requests go into rolling per-route histograms. They are kept in
+process, so every worker reports its own requests only: once per window
+each worker logs a summary line per route (logger core.metrics, level
+INFO), and staff can read the histograms of the worker serving the
+request at /api/metrics/.
+"""
+
+import logging
+import threading
+import time
+
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+HISTOGRAM_SLOTS = 10
+
+_current_metrics = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Query count, database time and serializer time of one request; times in seconds."""
+    __slots__ = ('started', 'query_count', 'db_time', 'serializer_time', 'serializing')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializing = False
+
+
+def get_request_metrics():
+    """Return the metrics of the request being measured, or None."""
+    return _current_metrics.get()
+
+
+@contextmanager
+def measure_request():
+    """Collect the metrics of the queries and serializers run in this block."""
+    metrics = RequestMetrics()
+    token = _current_metrics.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current_metrics.reset(token)
+
+
+@contextmanager
+def measure_serialization():
+    """Add the time of this block to the serializer time; nested blocks are not counted again."""
+    metrics = _current_metrics.get()
+    if metrics is None or metrics.serializing:
+        yield
+        return
+    metrics.serializing = True
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serializer_time += time.perf_counter() - started
+        metrics.serializing = False
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute wrapper adding the query and its time to the current request's metrics."""
+    metrics = _current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.query_count += 1
+        metrics.db_time += time.perf_counter() - started
+
+
+def install_query_recorder(connection):
+    """
+    Add the query recorder to a database connection, once.
+
+    It goes first in the list, because execute_wrapper() blocks remove
+    the last wrapper when they exit.
+    """
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+class _Slot:
+    __slots__ = ('start', 'count', 'latency', 'queries')
+
+    def __init__(self, start):
+        self.start = start
+        self.count = 0
+        self.latency = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.queries = [0] * (len(QUERY_BUCKETS) + 1)
+
+
+def _bucket_labels(bounds):
+    return [f'<={bound}' for bound in bounds] + [f'>{bounds[-1]}']
+
+
+class RouteHistograms:
+    """
+    Rolling latency and query count histograms per route.
+
+    The window of REQUEST_METRICS_WINDOW seconds is split into
+    HISTOGRAM_SLOTS time slots. A request is counted in the current slot
+    and slots older than the window are dropped, so the histograms cover
+    the last window seconds.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.routes = {}
+        self.next_summary = None
+
+
+    def get_window(self):
+        return getattr(settings, 'REQUEST_METRICS_WINDOW', 300)
+
+
+    def record(self, route, duration_ms, query_count, now=None):
+        now = time.time() if now is None else now
+        window = self.get_window()
+        slot_start = now - now % (window / HISTOGRAM_SLOTS)
+        with self.lock:
+            slots = self.routes.setdefault(route, deque())
+            while slots and slots[0].start <= now - window:
+                slots.popleft()
+            if not slots or slots[-1].start != slot_start:
+                slots.append(_Slot(slot_start))
+            slot = slots[-1]
+            slot.count += 1
+            slot.latency[bisect_left(LATENCY_BUCKETS_MS, duration_ms)] += 1
+            slot.queries[bisect_left(QUERY_BUCKETS, query_count)] += 1
+
+
+    def snapshot(self, now=None):
+        """Return {route: {'count', 'latency_ms', 'queries'}} for the routes requested within the window."""
+        now = time.time() if now is None else now
+        cutoff = now - self.get_window()
+        result = {}
+        with self.lock:
+            for route, slots in self.routes.items():
+                current = [slot for slot in slots if slot.start > cutoff]
+                if not current:
+                    continue
+                result[route] = {
+                    'count': sum(slot.count for slot in current),
+                    'latency_ms': dict(zip(_bucket_labels(LATENCY_BUCKETS_MS), map(sum, zip(*(slot.latency for slot in current))))),
+                    'queries': dict(zip(_bucket_labels(QUERY_BUCKETS), map(sum, zip(*(slot.queries for slot in current)))))
+                }
+        return result
+
+
+    def summary_due(self, now=None):
+        """Return True for the first call after each full window; the first call starts the window."""
+        now = time.time() if now is None else now
+        with self.lock:
+            if self.next_summary is not None and now < self.next_summary:
+                return False
+            due = self.next_summary is not None
+            self.next_summary = now + self.get_window()
+            return due
+
+
+    def clear(self):
+        with self.lock:
+            self.routes.clear()
+            self.next_summary = None
+
+
+route_histograms = RouteHistograms()
+
+
+def _format_buckets(buckets):
+    return ' '.join(f'{label}:{count}' for label, count in buckets.items() if count) or '-'
+
+
+def log_route_summary(now=None):
+    """Log one line per route with its request count and histograms over the window."""
+    window = route_histograms.get_window()
+    for route, histogram in sorted(route_histograms.snapshot(now).items()):
+        logger.info(
+            '%s: %d requests in the last %d s, latency ms %s, queries %s',
+            route, histogram['count'], window,
+            _format_buckets(histogram['latency_ms']), _format_buckets(histogram['queries'])
+        )
+
+
+def get_route(request):
+    """Return the route label of a request, e.g. 'GET offers-list'."""
+    match = getattr(request, 'resolver_match', None)
+    return f"{request.method} {match.view_name if match else 'unmatched'}"
+
+
+def get_budget(route):
+    """Return the (query count, latency ms) budget of a route."""
+    budget = getattr(settings, 'REQUEST_BUDGETS', {}).get(route, {})
+    return (
+        budget.get('queries', getattr(settings, 'REQUEST_QUERY_BUDGET', 25)),
+        budget.get('latency_ms', getattr(settings, 'REQUEST_LATENCY_BUDGET_MS', 500))
+    )
+
+
+def finish_request(request, response, metrics):
+    """
+    Set the Server-Timing header, record the request in the histograms and log budget overruns.
+
+    The first request after each window also logs the route summary.
+    """
+    duration_ms = (time.perf_counter() - metrics.started) * 1000
+    response['Server-Timing'] = (
+        f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.query_count} queries", '
+        f'serializer;dur={metrics.serializer_time * 1000:.1f}, '
+        f'total;dur={duration_ms:.1f}'
+    )
+
+    route = get_route(request)
+    route_histograms.record(route, duration_ms, metrics.query_count)
+    if route_histograms.summary_due():
+        log_route_summary()
+
+    query_budget, latency_budget = get_budget(route)
+    if metrics.query_count > query_budget or duration_ms > latency_budget:
+        logger.warning(
+            '%s %s over budget: %d queries (budget %d), %.1f ms (budget %d ms), db %.1f ms, serializer %.1f ms',
+            route, request.get_full_path(), metrics.query_count, query_budget, duration_ms, latency_budget,
+            metrics.db_time * 1000, metrics.serializer_time * 1000
+        )
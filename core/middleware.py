@@ -0,0 +1,207 @@
+"""
+Project-wide middleware.
+"""
+
+import hashlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+
+from rest_framework.authtoken.models import Token
+
+from auth_app.api.authentication import token_cache
+from core.metrics import finish_request, measure_request
+from core.routers import get_replica_lag, get_replicas, replica_reads, sync_sqlite_replicas
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PIN_PREFIX = 'db:primary:'
+
+
+def get_credentials_key(credentials):
+    """Return the pin key of a token or session credential."""
+    return PIN_PREFIX + hashlib.sha256(credentials.encode()).hexdigest()
+
+
+def get_user_key(user_id):
+    """Return the pin key of a user."""
+    return f'{PIN_PREFIX}user:{user_id}'
+
+
+def get_credentials(request):
+    return request.META.get('HTTP_AUTHORIZATION') or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+
+
+def get_token_key(request):
+    """Return the key of the request's token, or None."""
+    auth = request.META.get('HTTP_AUTHORIZATION', '').split()
+    if len(auth) == 2 and auth[0] == 'Token':
+        return auth[1]
+    return None
+
+
+def get_read_pin_keys(request):
+    """
+    Return the pin keys of a safe request: its credentials and the user they belong to.
+
+    The user is looked up without authenticating the request, from the
+    token cache or the primary, or from the session.
+    """
+    credentials = get_credentials(request)
+    if not credentials:
+        return []
+    keys = [get_credentials_key(credentials)]
+    token_key = get_token_key(request)
+    if token_key is not None:
+        cached = token_cache.get(token_key)
+        user_id = cached[0].pk if cached else Token.objects.filter(key=token_key).values_list('user_id', flat=True).first()
+    else:
+        user_id = request.session.get(SESSION_KEY) if hasattr(request, 'session') else None
+    if user_id is not None:
+        keys.append(get_user_key(user_id))
+    return keys
+
+
+async def aget_read_pin_keys(request):
+    """See get_read_pin_keys()."""
+    credentials = get_credentials(request)
+    if not credentials:
+        return []
+    keys = [get_credentials_key(credentials)]
+    token_key = get_token_key(request)
+    if token_key is not None:
+        cached = token_cache.get(token_key)
+        user_id = cached[0].pk if cached else await Token.objects.filter(key=token_key).values_list('user_id', flat=True).afirst()
+    else:
+        user_id = await request.session.aget(SESSION_KEY) if hasattr(request, 'session') else None
+    if user_id is not None:
+        keys.append(get_user_key(user_id))
+    return keys
+
+
+def get_write_pin_keys(request, response):
+    """
+    Return the pin keys of a write request.
+
+    These are its credentials and its authenticated user, and for login
+    and registration responses the issued token and its user, so the
+    first requests with a new token read from the primary as well.
+    """
+    keys = []
+    credentials = get_credentials(request)
+    if credentials:
+        keys.append(get_credentials_key(credentials))
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        keys.append(get_user_key(user.pk))
+    data = getattr(response, 'data', None)
+    if isinstance(data, dict) and data.get('token'):
+        keys.append(get_credentials_key('Token ' + data['token']))
+        if data.get('user_id') is not None:
+            keys.append(get_user_key(data['user_id']))
+    return keys
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Serve safe requests from the read replicas, with sticky primary reads after a write.
+
+    After a client sends a write request, its reads go to the primary
+    for REPLICA_LAG_SECONDS, so it always sees its own writes even if
+    the replicas lag behind. A write pins its token or session and its
+    user, so the user's other tokens and sessions read from the primary
+    too; login and registration also pin the token they issue. The pins
+    live in the cache, which must be shared by all worker processes.
+    Under ASGI the middleware runs on the event loop, so the async views
+    are not pushed onto a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not get_replicas():
+            return self.get_response(request)
+
+        if request.method in SAFE_METHODS:
+            pin_keys = get_read_pin_keys(request)
+            if not pin_keys or not cache.get_many(pin_keys):
+                with replica_reads():
+                    return self.get_response(request)
+            return self.get_response(request)
+
+        response = self.get_response(request)
+        pin_keys = get_write_pin_keys(request, response)
+        if pin_keys:
+            cache.set_many(dict.fromkeys(pin_keys, 1), timeout=get_replica_lag())
+        if getattr(settings, 'SQLITE_REPLICA_AUTOSYNC', False):
+            sync_sqlite_replicas()
+        return response
+
+
+    async def __acall__(self, request):
+        if not get_replicas():
+            return await self.get_response(request)
+
+        if request.method in SAFE_METHODS:
+            pin_keys = await aget_read_pin_keys(request)
+            if not pin_keys or not await cache.aget_many(pin_keys):
+                with replica_reads():
+                    return await self.get_response(request)
+            return await self.get_response(request)
+
+        response = await self.get_response(request)
+        pin_keys = await sync_to_async(get_write_pin_keys)(request, response)
+        if pin_keys:
+            await cache.aset_many(dict.fromkeys(pin_keys, 1), timeout=get_replica_lag())
+        if getattr(settings, 'SQLITE_REPLICA_AUTOSYNC', False):
+            await sync_to_async(sync_sqlite_replicas)()
+        return response
+
+
+class RequestMetricsMiddleware:
+    """
+    Measure query count, database time and serializer time of every request.
+
+    The figures are sent in a Server-Timing header, added to the rolling
+    per-route histograms, and logged as a warning when a request exceeds
+    its query or latency budget (see core.metrics). Set
+    REQUEST_METRICS_ENABLED to False to remove the middleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        with measure_request() as metrics:
+            response = self.get_response(request)
+        finish_request(request, response, metrics)
+        return response
+
+
+    async def __acall__(self, request):
+        with measure_request() as metrics:
+            response = await self.get_response(request)
+        finish_request(request, response, metrics)
+        return response
@@ -0,0 +1,85 @@
+"""
+Database routing between the primary and read replicas.
+
+Writes always go to the primary ('default'). Reads go to a replica only
+inside replica_reads(), which ReplicaRoutingMiddleware enters for safe
+requests of clients that did not write recently. Everything else,
+including management commands and background threads, reads from the
+primary.
+
+For local development with SQLite, sync_sqlite_replicas() stands in for
+replication by copying the primary database file into every replica.
+"""
+
+import random
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+PRIMARY_DATABASE = 'default'
+
+_read_from_replica = ContextVar('read_from_replica', default=False)
+
+
+def get_replicas():
+    """Return the aliases of the configured read replicas."""
+    return list(getattr(settings, 'DATABASE_REPLICAS', []))
+
+
+def get_replica_lag():
+    """Return the assumed maximum replication lag in seconds."""
+    return getattr(settings, 'REPLICA_LAG_SECONDS', 5)
+
+
+def reads_from_replica():
+    """Return True if reads in the current context are routed to a replica."""
+    return _read_from_replica.get() and bool(get_replicas())
+
+
+@contextmanager
+def replica_reads():
+    """Route reads in this block to a replica."""
+    token = _read_from_replica.set(True)
+    try:
+        yield
+    finally:
+        _read_from_replica.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """Send reads to a random replica inside replica_reads(), everything else to the primary."""
+
+    def db_for_read(self, model, **hints):
+        if reads_from_replica():
+            return random.choice(get_replicas())
+        return PRIMARY_DATABASE
+
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY_DATABASE
+
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """Replicas receive their schema through replication, never through migrate."""
+        return db not in get_replicas()
+
+
+def sync_sqlite_replicas():
+    """Copy the primary SQLite database into every SQLite replica."""
+    primary = connections[PRIMARY_DATABASE]
+    if primary.vendor != 'sqlite':
+        return
+    primary.ensure_connection()
+    for alias in get_replicas():
+        replica = connections[alias]
+        if replica.vendor != 'sqlite':
+            continue
+        replica.ensure_connection()
+        primary.connection.backup(replica.connection)
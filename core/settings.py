@@ -10,8 +10,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -45,15 +49,18 @@ INSTALLED_APPS = [
     'rest_framework',
     'rest_framework.authtoken',
     'phonenumber_field',
+    'core',
     'coderr_app',
     'auth_app',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestMetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -89,6 +96,28 @@ WSGI_APPLICATION = 'core.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# DJANGO_DB_PROFILE=production tunes SQLite for concurrent writers: WAL
+# mode, so readers don't block behind a writer, and transactions that
+# take the write lock up front, waiting up to busy_timeout milliseconds
+# instead of failing with "database is locked". It also keeps
+# connections open across requests. Development and the (in-memory) test
+# database keep SQLite's defaults.
+
+DB_PROFILE = os.environ.get('DJANGO_DB_PROFILE', 'development')
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -20000,
+    'mmap_size': 134217728,
+    'busy_timeout': 20000,
+}
+
+SQLITE_PRODUCTION_OPTIONS = {
+    'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+    'transaction_mode': 'IMMEDIATE',
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
@@ -96,6 +125,84 @@ DATABASES = {
     }
 }
 
+if DB_PROFILE == 'production':
+    DATABASES['default']['OPTIONS'] = SQLITE_PRODUCTION_OPTIONS
+    DATABASES['default']['CONN_MAX_AGE'] = 600
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+
+# DJANGO_DB_ENGINE=postgresql switches to PostgreSQL, configured from the
+# POSTGRES_* variables. Connections come from Django's psycopg pool, which
+# replaces persistent connections (CONN_MAX_AGE must stay 0).
+
+if os.environ.get('DJANGO_DB_ENGINE') == 'postgresql':
+    DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get('POSTGRES_DB', 'coderr'),
+        'USER': os.environ.get('POSTGRES_USER', 'coderr'),
+        'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+        'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+        'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+        'OPTIONS': {
+            'pool': {
+                'min_size': int(os.environ.get('POSTGRES_POOL_MIN_SIZE', 2)),
+                'max_size': int(os.environ.get('POSTGRES_POOL_MAX_SIZE', 10)),
+                'timeout': int(os.environ.get('POSTGRES_POOL_TIMEOUT', 10)),
+            },
+        },
+    }
+
+# Read replicas: safe requests read from them (see core.routers), while
+# a client's reads stick to the primary for REPLICA_LAG_SECONDS after it
+# wrote. POSTGRES_REPLICA_HOSTS lists PostgreSQL replica hosts. For local
+# testing, DJANGO_SQLITE_REPLICAS lists SQLite files that are refreshed
+# by copying the primary after every write request.
+
+DATABASE_REPLICAS = []
+REPLICA_LAG_SECONDS = 5
+SQLITE_REPLICA_AUTOSYNC = False
+
+if DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+    replica_settings = [{'HOST': host} for host in os.environ.get('POSTGRES_REPLICA_HOSTS', '').split(',') if host]
+else:
+    replica_settings = [{'NAME': BASE_DIR / name} for name in os.environ.get('DJANGO_SQLITE_REPLICAS', '').split(',') if name]
+    SQLITE_REPLICA_AUTOSYNC = bool(replica_settings)
+
+for index, replica in enumerate(replica_settings, start=1):
+    DATABASES[f'replica_{index}'] = {**DATABASES['default'], **replica, 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(f'replica_{index}')
+
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+
+# The offers list version stamps and counters, the base-info snapshot and the
+# replica pins live in the cache and must be shared by all worker processes.
+# REDIS_URL (e.g. redis://localhost:6379/0) selects a shared Redis cache.
+# Without it every process has its own local memory cache, which is only
+# correct when a single process serves the API. PostgreSQL replicas
+# require REDIS_URL, since a pin set by one worker must hold in all of
+# them; the local SQLite replicas are meant for a single process.
+
+REDIS_URL = os.environ.get('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+if DATABASE_REPLICAS and DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql' and not REDIS_URL:
+    raise ImproperlyConfigured('POSTGRES_REPLICA_HOSTS requires REDIS_URL, so that replica pins are shared by all processes.')
+
+
+# The model backend, hashing in the bounded pool when authenticating under ASGI
+AUTHENTICATION_BACKENDS = ['auth_app.backends.HashingPoolModelBackend']
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -136,6 +243,52 @@ STATIC_ROOT = BASE_DIR / "static"
 
 MEDIA_ROOT = BASE_DIR / "media"
 MEDIA_URL = "/media/"
+
+# Base info snapshot: fresh for the TTL, then served stale while it is refreshed
+BASE_INFO_CACHE_TTL = 5
+BASE_INFO_CACHE_STALE_TTL = 60
+
+# Uploaded images are normalized and resized in a background thread pool
+IMAGE_MAX_DIMENSION = 2048
+IMAGE_VARIANT_WIDTHS = [160, 320, 640]
+IMAGE_LIST_VARIANT_WIDTH = 320
+IMAGE_PROCESSING_WORKERS = 2
+
+# Token authentications are cached per process (LRU, entries live for the TTL in seconds)
+TOKEN_AUTH_CACHE_SIZE = 1024
+TOKEN_AUTH_CACHE_TTL = 60
+
+# Under ASGI, at most this many password hashes run at once; further logins queue
+PASSWORD_HASHING_CONCURRENCY = 2
+
+# Per-request metrics: Server-Timing header, rolling per-route histograms over
+# the window (seconds), logged as one INFO line per route once per window and
+# readable by staff at /api/metrics/, and a warning for requests over their budget.
+# REQUEST_BUDGETS overrides the budgets per route, e.g.
+# {'GET offers-list': {'queries': 5, 'latency_ms': 200}}
+REQUEST_METRICS_ENABLED = True
+REQUEST_METRICS_WINDOW = 300
+REQUEST_QUERY_BUDGET = 25
+REQUEST_LATENCY_BUDGET_MS = 500
+REQUEST_BUDGETS = {}
+
+# Send the metrics summaries and budget warnings to the console, where the
+# process manager collects them.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.metrics': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
+
+# The test runner raises the latency budget, since test requests are no
+# measure of production latency (see core.test_runner)
+TEST_RUNNER = 'core.test_runner.CoderrTestRunner'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -144,7 +297,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 REST_FRAMEWORK = {
     'DATETIME_FORMAT': "%Y-%m-%dT%H:%M:%SZ",
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'auth_app.api.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ]
 }
\ No newline at end of file
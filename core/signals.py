@@ -0,0 +1,17 @@
+"""
+Signal handlers for the project core.
+
+Adds the request metrics query recorder to every new database
+connection, whichever app opens it.
+"""
+
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from core.metrics import install_query_recorder
+
+
+@receiver(connection_created)
+def record_connection_queries(sender, connection, **kwargs):
+    """Count the queries of new connections in the request metrics."""
+    install_query_recorder(connection)
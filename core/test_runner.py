@@ -0,0 +1,29 @@
+"""
+Test runner for the Coderr project.
+"""
+
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+TEST_REQUEST_LATENCY_BUDGET_MS = 60000
+
+
+class CoderrTestRunner(DiscoverRunner):
+    """
+    DiscoverRunner with a latency budget the tests don't reach.
+
+    Password hashing and the thread pools of the tests make requests
+    slower than in production, so the default budget would log a warning
+    for many of them. Query budgets still apply; tests of the latency
+    budget override it themselves.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.latency_budget = override_settings(REQUEST_LATENCY_BUDGET_MS=TEST_REQUEST_LATENCY_BUDGET_MS)
+        self.latency_budget.enable()
+
+
+    def teardown_test_environment(self, **kwargs):
+        self.latency_budget.disable()
+        super().teardown_test_environment(**kwargs)
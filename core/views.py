@@ -0,0 +1,29 @@
+"""
+Project-wide API views.
+"""
+
+import os
+
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.metrics import route_histograms
+
+
+class RequestMetricsView(APIView):
+    """
+    Return the rolling per-route histograms of the worker serving the request.
+
+    Staff only. Every worker process keeps its own histograms, so the
+    response names the process (pid); the per-route summary lines that
+    every worker logs once per window cover all of them.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response({
+            'pid': os.getpid(),
+            'window_seconds': route_histograms.get_window(),
+            'routes': route_histograms.snapshot()
+        })